@@ -34,4 +34,5 @@ setup(
         "flask-smorest",
         "flask_jwt_extended",
     ],
+    extras_require={"fast": ["orjson"], "export": ["pyarrow"]},
 )
@@ -1,16 +1,36 @@
 from flask import current_app
 from werkzeug.local import LocalProxy
+from sqlalchemy import event
 import logging
 from flask_sqlalchemy import SQLAlchemy
 from flask import Flask
-from typing import Optional, Callable
+from typing import Optional, Callable, Dict, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from smorest_crud.cache import CacheBackend
+    from smorest_crud.replicas import ReplicaRouter
+    from smorest_crud.instrumentation import EndpointMetrics
+    from smorest_crud.dispatch import ViewConfig
 
 log = logging.getLogger(__name__)
 
 # access initialized extension
 _crud = LocalProxy(lambda: current_app.extensions["crud"])
 
-config_keys = dict(get_user="CRUD_GET_USER", key_attr="CRUD_DEFAULT_KEY_COLUMN")
+config_keys = dict(
+    get_user="CRUD_GET_USER",
+    key_attr="CRUD_DEFAULT_KEY_COLUMN",
+    cache="CRUD_CACHE",
+    cache_max_size="CRUD_CACHE_MAX_SIZE",
+    cache_ttl="CRUD_CACHE_TTL",
+    replica_binds="CRUD_REPLICA_BINDS",
+    replica_sticky_seconds="CRUD_REPLICA_STICKY_SECONDS",
+    replica_sticky_store="CRUD_REPLICA_STICKY_STORE",
+    instrumentation_enabled="CRUD_INSTRUMENTATION_ENABLED",
+    metrics_callback="CRUD_METRICS_CALLBACK",
+    lazy_load_detection="CRUD_LAZY_LOAD_DETECTION",
+    lazy_load_threshold="CRUD_LAZY_LOAD_THRESHOLD",
+)
 
 
 class CRUD(object):
@@ -23,7 +43,7 @@ class CRUD(object):
 
         app = Flask()
         JWTManager(app)
-        CRUD(app)
+        crud = CRUD(app)
 
         app.config.update(
             CRUD_GET_USER=get_current_user,
@@ -31,6 +51,32 @@ class CRUD(object):
             SECRET_KEY="wnt2die",
             CRUD_DEFAULT_KEY_COLUMN="extid",
         )
+        crud.register_blueprint(pet_blp)
+
+    Views are validated when their blueprint is registered with
+    :meth:`register_blueprint`. Blueprints registered otherwise, e.g. with
+    ``Api.register_blueprint``, are validated by :meth:`compile_views`.
+
+    Views with `cache_enabled` use ``CRUD_CACHE``, an instance of
+    :class:`smorest_crud.cache.CacheBackend`. It defaults to an in-process
+    :class:`smorest_crud.cache.LRUCache` sized by ``CRUD_CACHE_MAX_SIZE`` (1024)
+    with entries expiring after ``CRUD_CACHE_TTL`` seconds (60).
+
+    Reads of GET requests go to the ``SQLALCHEMY_BINDS`` named in
+    ``CRUD_REPLICA_BINDS``, round-robin. After a client writes, its reads stay on
+    the primary for ``CRUD_REPLICA_STICKY_SECONDS`` (5). Clients are told apart
+    by JWT identity and remembered in ``CRUD_REPLICA_STICKY_STORE``, a
+    :class:`smorest_crud.cache.CacheBackend` to share between server processes,
+    see :class:`smorest_crud.replicas.ReplicaRouter`.
+
+    ``CRUD_INSTRUMENTATION_ENABLED`` adds a ``Server-Timing`` header to view
+    responses and collects per-endpoint histograms in :attr:`metrics`.
+    ``CRUD_METRICS_CALLBACK`` is called with the endpoint and a dict of the
+    request's metrics, see :mod:`smorest_crud.instrumentation`.
+
+    In development and tests, set ``CRUD_LAZY_LOAD_DETECTION`` to ``"warn"`` or
+    ``"raise"`` to be told when a view lazy loads a relationship for more than
+    ``CRUD_LAZY_LOAD_THRESHOLD`` (1) items, see :mod:`smorest_crud.lazy_loads`.
     """
 
     db: SQLAlchemy
@@ -38,6 +84,14 @@ class CRUD(object):
     get_user: Optional[Callable]
     key_attr: str = "id"
     access_control_enabled: bool
+    cache: "CacheBackend"
+    replicas: Optional["ReplicaRouter"] = None
+    instrumentation_enabled: bool = False
+    metrics: Optional["EndpointMetrics"] = None
+    metrics_callback: Optional[Callable] = None
+    lazy_load_detection: Optional[str] = None
+    lazy_load_threshold: int = 1
+    view_configs: Dict[type, "ViewConfig"]
 
     def __init__(self, app=None):
         self.app = app
@@ -67,14 +121,123 @@ class CRUD(object):
         # save stuff for later
         self.app = app
 
+        # current user and access decisions are cached for the duration of a request
+        from smorest_crud.access_control.utils import (
+            _clear_request_cache,
+            _clear_access_decisions,
+        )
+
+        app.teardown_request(_clear_request_cache)
+        if not event.contains(self.db.session, "after_commit", _clear_access_decisions):
+            event.listen(self.db.session, "after_commit", _clear_access_decisions)
+
+        # object cache for ResourceView lookups
+        from smorest_crud.cache import LRUCache, listen_for_invalidations
+
+        self.cache = app.config.get(config_keys["cache"]) or LRUCache(
+            maxsize=app.config.get(config_keys["cache_max_size"], 1024),
+            ttl=app.config.get(config_keys["cache_ttl"], 60),
+        )
+        listen_for_invalidations(self.db.session)
+
+        # read replicas
+        replica_binds = app.config.get(config_keys["replica_binds"])
+        if replica_binds:
+            from smorest_crud.replicas import ReplicaRouter
+
+            self.replicas = ReplicaRouter(
+                self.db,
+                app,
+                replica_binds,
+                sticky_seconds=app.config.get(config_keys["replica_sticky_seconds"], 5),
+                sticky_store=app.config.get(config_keys["replica_sticky_store"]),
+            )
+            app.after_request(self.replicas.after_request)
+            app.teardown_request(self.replicas.release)
+            app.teardown_appcontext(self.replicas.remove)
+
+        # performance metrics
+        self.instrumentation_enabled = bool(
+            app.config.get(config_keys["instrumentation_enabled"])
+        )
+        if self.instrumentation_enabled:
+            from smorest_crud.instrumentation import (
+                EndpointMetrics,
+                listen_for_metrics,
+            )
+
+            self.metrics = EndpointMetrics()
+            self.metrics_callback = app.config.get(config_keys["metrics_callback"])
+            listen_for_metrics()
+
+        # N+1 detection
+        self.lazy_load_detection = app.config.get(config_keys["lazy_load_detection"])
+        if self.lazy_load_detection:
+            from smorest_crud.lazy_loads import MODES, listen_for_lazy_loads
+
+            if self.lazy_load_detection not in MODES:
+                raise Exception(
+                    f"CRUD_LAZY_LOAD_DETECTION must be one of {MODES}, "
+                    f"not {self.lazy_load_detection!r}"
+                )
+            self.lazy_load_threshold = app.config.get(
+                config_keys["lazy_load_threshold"], 1
+            )
+            listen_for_lazy_loads()
+
+        # views are validated once all blueprints are registered, or at the
+        # first request if the app doesn't call compile_views()
+        self.view_configs = {}
+        if hasattr(app, "before_first_request"):
+            app.before_first_request(self.compile_views)
+
         # save for localproxy
         app.extensions["crud"] = self
 
+    def compile_views(self):
+        """Resolve and validate the configuration of every CRUD view registered on the app.
+
+        Call it after registering blueprints to fail at startup, otherwise it
+        runs before the first request.
+
+        :raises smorest_crud.dispatch.ViewConfigError: if a view is misconfigured.
+        """
+        from smorest_crud.view import CRUDView
+
+        for view_func in self.app.view_functions.values():
+            view_cls = getattr(view_func, "view_class", None)
+            if view_cls is not None and issubclass(view_cls, CRUDView):
+                self.view_config(view_cls)
+
+    def register_blueprint(self, blueprint, **options):
+        """Register `blueprint` on the app and validate its CRUD views.
+
+        :raises smorest_crud.dispatch.ViewConfigError: if a view is misconfigured.
+        """
+        self.app.register_blueprint(blueprint, **options)
+        self.compile_views()
+
+    def view_config(self, view_cls) -> "ViewConfig":
+        """Return the resolved configuration of `view_cls`, compiling it on first use."""
+        config = self.view_configs.get(view_cls)
+        if config is None:
+            from smorest_crud.dispatch import compile_view_config
+
+            config = self.view_configs[view_cls] = compile_view_config(self, view_cls)
+        return config
+
+    def plan_cache_info(self) -> dict:
+        """Hits, misses and hit rate of cached loader options and baked lookups of views."""
+        from smorest_crud.plans import plan_cache
+
+        return plan_cache.info()
+
 
-from smorest_crud.view import ResourceView, CollectionView
+from smorest_crud.view import ResourceView, CollectionView, BulkCollectionMixin
 from smorest_crud.access_control import (
     AccessControlUser,
     AccessControlQuery,
+    access_rule,
     get_for_current_user_or_404,
     query_for_current_user,
 )
@@ -82,9 +245,11 @@ from smorest_crud.access_control import (
 __all__ = (
     "ResourceView",
     "CollectionView",
+    "BulkCollectionMixin",
     "CRUD",
     "AccessControlUser",
     "AccessControlQuery",
+    "access_rule",
     "get_for_current_user_or_404",
     "query_for_current_user",
 )
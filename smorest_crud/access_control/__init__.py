@@ -2,11 +2,20 @@ from smorest_crud.access_control.utils import (
     get_for_current_user_or_404,
     query_for_current_user,
 )
-from smorest_crud.access_control.models import AccessControlUser, AccessControlQuery
+from smorest_crud.access_control.models import (
+    AccessControlUser,
+    AccessControlQuery,
+    access_rule,
+    access_criterion,
+    has_access_rule,
+)
 
 __all__ = (
     "AccessControlUser",
     "AccessControlQuery",
+    "access_rule",
+    "access_criterion",
+    "has_access_rule",
     "get_for_current_user_or_404",
     "query_for_current_user",
 )
@@ -1,12 +1,66 @@
-from typing import Optional, TypeVar, Type, Generic, Union
+from typing import Optional, TypeVar, Type, Generic, Union, List, Sequence
 from smorest_crud import _crud
 
 from flask_sqlalchemy import BaseQuery, Model
 from flask import abort
+from sqlalchemy import inspect
+from sqlalchemy.ext.hybrid import hybrid_method
 
 T = TypeVar("T", bound=Model)
 
 
+class access_rule(hybrid_method):
+    """Declare a `user_can_*` check as an expression usable in SQL and in Python.
+
+    Called on an instance it checks that object, called on the class it returns
+    a SQL criterion that views use to filter queries in the database.
+
+    Example::
+
+        class Pet(Model, AccessControlUser):
+            @access_rule
+            def user_can_write(self, user):
+                return self.owner_id == user.id
+
+        Pet.query_for_user(user)  # SELECT ... WHERE pet.owner_id = :id
+        pet.user_can_write(user)  # True or False
+
+    Stick to operators that work on both columns and values (``==``, ``&``, ``|``),
+    or provide a separate SQL version with ``@user_can_write.expression``.
+    """
+
+
+def access_criterion(model: Type[Model], check: str, user):
+    """Return the SQL criterion of `model`'s `user_can_{check}` access rule.
+
+    :returns: None if the check isn't declared with :class:`access_rule`.
+    """
+    name = _access_rule_name(model, check)
+    if name is None:
+        return None
+    return getattr(model, name)(user)
+
+
+def has_access_rule(model: Type[Model], check: str) -> bool:
+    """Whether `model` declares `user_can_{check}` with :class:`access_rule`."""
+    return _access_rule_name(model, check) is not None
+
+
+def _access_rule_name(model: Type[Model], check: str) -> Optional[str]:
+    name = f"user_can_{check}"
+    for klass in model.__mro__:
+        rule = klass.__dict__.get(name)
+        if rule is None:
+            continue
+        if isinstance(rule, access_rule):
+            return name
+        if klass is AccessControlUser and check == "read":
+            # default user_can_read() defers to user_can_write()
+            return _access_rule_name(model, "write")
+        return None
+    return None
+
+
 class AccessControlQuery(BaseQuery):
     """Base query class to use for access restriction."""
 
@@ -40,10 +94,21 @@ class AccessControlUser(Generic[T]):
 
     @classmethod
     def query_for_user(cls, user: "AccessControlUser") -> Optional[AccessControlQuery]:
-        """Filter list of items for `user`, or None if disallowed."""
-        if not hasattr(cls.query, "query_for_user"):
+        """Filter list of items for `user`, or None if disallowed.
+
+        Also filters by `user_can_read` if it is an :class:`access_rule`.
+        """
+        criterion = access_criterion(cls, "read", user)
+        if _implements_query_for_user(cls.query):
+            query = cls.query.query_for_user(user)
+        elif criterion is not None:
+            query = cls.query
+        else:
             return None
-        return cls.query.query_for_user(user)
+
+        if criterion is not None and query is not None:
+            query = query.filter(criterion)
+        return query
 
     @classmethod
     def get_for_user_or_404(
@@ -59,11 +124,10 @@ class AccessControlUser(Generic[T]):
                 f"class {cls.__name__} doesn't have attribute {_crud.key_attr}. Try to set CRUD_DEFAULT_KEY_COLUMN in configs."
             )
 
-        obj = (
-            cls.query.query_for_user(user)
-            .filter(getattr(cls, _crud.key_attr) == id_value)
-            .one_or_none()
-        )
+        query = cls.query_for_user(user)
+        obj = None
+        if query is not None:
+            obj = query.filter(getattr(cls, _crud.key_attr) == id_value).one_or_none()
         if obj is None:
             abort(404)
         return obj
@@ -84,3 +148,62 @@ class AccessControlUser(Generic[T]):
     def user_can_create(self, user: "AccessControlUser", args: Optional[dict]) -> bool:
         """Check if `user` is allowed to create."""
         return True
+
+    @classmethod
+    def user_can_read_many(
+        cls, user: "AccessControlUser", items: Sequence[T]
+    ) -> List[bool]:
+        """Check `user_can_read` for a batch of `items`, in order.
+
+        Answered with one query if `user_can_read` is an :class:`access_rule`,
+        otherwise calls `user_can_read` on each item.
+        Override to check a whole page at once some other way.
+        """
+        return _check_many(cls, "read", user, items)
+
+    @classmethod
+    def user_can_write_many(
+        cls, user: "AccessControlUser", items: Sequence[T]
+    ) -> List[bool]:
+        """Check `user_can_write` for a batch of `items`, in order.
+
+        See :meth:`user_can_read_many`.
+        """
+        return _check_many(cls, "write", user, items)
+
+    @classmethod
+    def user_can_create_many(
+        cls,
+        user: "AccessControlUser",
+        items: Sequence[T],
+        args: Sequence[Optional[dict]],
+    ) -> List[bool]:
+        """Check `user_can_create` for a batch of new `items` created from `args`."""
+        return [item.user_can_create(user, a) for item, a in zip(items, args)]
+
+
+def _check_many(model: Type[Model], check: str, user, items: Sequence) -> List[bool]:
+    """Run `user_can_{check}` on `items`, in a single query if it's an access rule."""
+    mapper = inspect(model)
+    states = [inspect(item) for item in items]
+    if (
+        has_access_rule(model, check)
+        and len(mapper.primary_key) == 1
+        and all(state.has_identity for state in states)
+    ):
+        pk_col = mapper.primary_key[0]
+        pks = [state.identity[0] for state in states]
+        allowed = {
+            pk
+            for (pk,) in model.query.with_entities(pk_col)
+            .filter(pk_col.in_(set(pks)))
+            .filter(access_criterion(model, check, user))
+        }
+        return [pk in allowed for pk in pks]
+
+    return [getattr(item, f"user_can_{check}")(user) for item in items]
+
+
+def _implements_query_for_user(query) -> bool:
+    meth = getattr(type(query), "query_for_user", None)
+    return meth is not None and meth is not AccessControlQuery.query_for_user
@@ -1,4 +1,7 @@
-from typing import Optional, TypeVar, Type, Union
+from typing import Optional, TypeVar, Type, Union, Callable
+
+from flask import g, has_app_context
+from sqlalchemy import inspect
 
 from smorest_crud import _crud, config_keys
 
@@ -18,16 +21,50 @@ def get_for_current_user_or_404(
     return model.get_for_user_or_404(_get_current_user(), id_value)
 
 
-def query_for_current_user(model: Type[T]) -> AccessControlQuery:
+def query_for_current_user(model: Type[T]) -> Optional[AccessControlQuery]:
     """
     Get query for the current authorized user using access checks.
+    See :meth:`AccessControlUser.query_for_user`, None if disallowed.
     :param model: date base model of the instance
     """
-    return model.query.query_for_user(_get_current_user())
+    return model.query_for_user(_get_current_user())
 
 
 def _get_current_user() -> Optional[T]:
+    """Return the user from `CRUD_GET_USER`, resolved once per request."""
+    if "crud_user" in g:
+        return g.crud_user
+
     get_user_func = _crud.app.config.get(config_keys["get_user"])
-    if not get_user_func:
-        return None
-    return get_user_func()
+    user = get_user_func() if get_user_func else None
+    g.crud_user = user
+    return user
+
+
+def _cached_check(user, check: str, item, check_func: Callable[[], bool]) -> bool:
+    """Return `check_func()`, remembering the decision for `item` until the request ends.
+
+    Only unmodified persistent items are cached, by identity.
+    """
+    state = inspect(item, raiseerr=False)
+    if state is None or not state.persistent or state.modified:
+        return check_func()
+
+    decisions = g.setdefault("crud_access_decisions", {})
+    key = (id(user), check, state.identity_key)
+    if key not in decisions:
+        decisions[key] = bool(check_func())
+    return decisions[key]
+
+
+def _clear_access_decisions(*args):
+    """Forget access decisions, e.g. after a commit changed the checked objects."""
+    if not has_app_context():
+        return
+    g.pop("crud_access_decisions", None)
+
+
+def _clear_request_cache(*args):
+    """Forget the current user and access decisions at the end of a request."""
+    g.pop("crud_user", None)
+    _clear_access_decisions()
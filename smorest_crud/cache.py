@@ -0,0 +1,183 @@
+"""Object caches for :class:`smorest_crud.ResourceView` lookups."""
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Hashable, Optional
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+
+class CacheBackend(object):
+    """Interface for caches of looked up items.
+
+    Values are detached SQLAlchemy instances made by :func:`detached_copy`;
+    backends storing them outside the process need to pickle them. Subclasses implement :meth:`_get`, :meth:`set`,
+    :meth:`delete` and :meth:`clear`.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return cached value for `key` or None, counting hits and misses."""
+        value = self._get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def stats(self) -> dict:
+        """Hit and miss counters."""
+        return dict(hits=self.hits, misses=self.misses)
+
+    def _get(self, key: Hashable) -> Optional[Any]:
+        raise NotImplementedError()
+
+    def set(self, key: Hashable, value: Any):
+        raise NotImplementedError()
+
+    def delete(self, key: Hashable):
+        raise NotImplementedError()
+
+    def clear(self):
+        raise NotImplementedError()
+
+
+class LRUCache(CacheBackend):
+    """In-process cache keeping the `maxsize` most recently used entries for `ttl` seconds."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        super().__init__()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class FakeCache(CacheBackend):
+    """Dict-backed cache for tests that never expires and records deleted keys."""
+
+    def __init__(self):
+        super().__init__()
+        self.entries = {}
+        self.deleted = []
+
+    def _get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, value):
+        self.entries[key] = value
+
+    def delete(self, key):
+        self.deleted.append(key)
+        self.entries.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
+
+
+def cache_key(model_cls, identity) -> str:
+    """Cache key for the item of `model_cls` with primary key `identity`.
+
+    `identity` is a primary key value or a tuple of them, as in the identity map.
+    Items are always cached by primary key, even for models with
+    `CRUD_DEFAULT_KEY_COLUMN`, and under the base class of inheritance
+    hierarchies, so lookups and invalidations agree.
+    """
+    model_cls = inspect(model_cls).base_mapper.class_
+    if isinstance(identity, tuple):
+        identity = ",".join(str(value) for value in identity)
+    return f"{model_cls.__name__}:{identity}"
+
+
+def item_cache_key(item) -> Optional[str]:
+    """Cache key for a loaded item, by its identity."""
+    state = inspect(item)
+    if state.identity is None:
+        return None
+    return cache_key(state.class_, state.identity)
+
+
+def detached_copy(item):
+    """Detached instance holding the loaded column values of `item`.
+
+    Unlike `item` it isn't tied to a session, so it can be shared between
+    requests and threads and survives commits expiring `item`.
+    """
+    state = inspect(item)
+    copy = state.mapper.class_manager.new_instance()
+    for prop in state.mapper.column_attrs:
+        if prop.key in state.dict:
+            set_committed_value(copy, prop.key, state.dict[prop.key])
+    make_transient_to_detached(copy)
+    return copy
+
+
+def _collect_invalidations(session, flush_context):
+    """Remember keys of items changed by a flush, to invalidate once committed."""
+    if not has_app_context() or "crud" not in current_app.extensions:
+        return
+    keys = session.info.setdefault("crud_invalidate", set())
+    for item in session.dirty | session.deleted:
+        key = item_cache_key(item)
+        if key is not None:
+            keys.add(key)
+
+
+def _invalidate_committed(session):
+    keys = session.info.pop("crud_invalidate", None)
+    if keys and has_app_context() and "crud" in current_app.extensions:
+        cache = current_app.extensions["crud"].cache
+        for key in keys:
+            cache.delete(key)
+
+
+def _discard_invalidations(session, previous_transaction):
+    session.info.pop("crud_invalidate", None)
+
+
+def listen_for_invalidations(session):
+    """Invalidate cached items changed by commits on `session`."""
+    for name, listener in (
+        ("after_flush", _collect_invalidations),
+        ("after_commit", _invalidate_committed),
+        ("after_soft_rollback", _discard_invalidations),
+    ):
+        if not event.contains(session, name, listener):
+            event.listen(session, name, listener)
@@ -0,0 +1,142 @@
+"""Change feeds for clients keeping a copy of a collection in sync.
+
+A :class:`smorest_crud.CollectionView` with `change_feed_enabled` answers
+``GET ?since=<cursor>`` with the items changed after the cursor, ordered by the
+view's `change_column` and key, and the keys of items deleted since then::
+
+    {"items": [...], "deleted": [3, 7], "next_cursor": "...", "has_more": false}
+
+Pass an empty ``?since=`` for the first sync, then the returned ``next_cursor``.
+Deletes are recorded as tombstones by views with a `tombstone_model`::
+
+    class Tombstone(db.Model, TombstoneMixin):
+        pass
+
+    class PetResource(ResourceView):
+        model = Pet
+        tombstone_model = Tombstone
+        tombstone_scope_column = "owner_id"
+
+Each tombstone records a scope, such as the deleted item's owner, and a change
+feed only reports deletes in the current user's
+:meth:`smorest_crud.CollectionView.tombstone_scopes`::
+
+    class PetCollection(CollectionView):
+        model = Pet
+        tombstone_model = Tombstone
+        change_feed_enabled = True
+        change_column = "updated_at"
+
+        def tombstone_scopes(self):
+            return [get_current_user().id]
+"""
+
+import json
+from datetime import date, datetime
+from typing import Iterable, List, Optional, Tuple
+
+from flask_sqlalchemy import Model
+from sqlalchemy import Column, DateTime, Integer, String, Text, func, or_
+
+
+class TombstoneMixin(object):
+    """Columns of a model recording the keys of deleted items."""
+
+    id = Column(Integer, primary_key=True)
+    """Increases with every delete, tombstones are read in this order."""
+
+    model_name = Column(String(255), nullable=False, index=True)
+    """Table name of the deleted item's model."""
+
+    key = Column(Text, nullable=False)
+    """JSON encoded `CRUD_DEFAULT_KEY_COLUMN` or primary key value."""
+
+    scope = Column(String(255), index=True)
+    """JSON encoded `tombstone_scope_column` value of the deleted item, None for everyone."""
+
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+def tombstone_values(
+    model_cls: Model, keys: List, scopes: Optional[List] = None
+) -> List[dict]:
+    """Rows to insert into a tombstone table for deleted `keys` of `model_cls`.
+
+    `scopes` holds the scope of each key, they are unscoped without it.
+    """
+    name = model_cls.__tablename__
+    now = datetime.utcnow()
+    if scopes is None:
+        scopes = [None] * len(keys)
+    return [
+        dict(
+            model_name=name,
+            key=_encode(key),
+            scope=None if scope is None else _encode(scope),
+            deleted_at=now,
+        )
+        for key, scope in zip(keys, scopes)
+    ]
+
+
+def tombstones_since(
+    session,
+    tombstone_model: Model,
+    model_cls: Model,
+    after: Optional[int],
+    limit: int,
+    scopes: Optional[Iterable] = None,
+) -> Tuple[List, Optional[int], bool]:
+    """Keys of `model_cls` items deleted after tombstone id `after`.
+
+    With `after` None only finds the latest tombstone id, to start following
+    deletes from. With `scopes`, only finds unscoped tombstones and those of
+    one of `scopes`.
+
+    :returns: Up to `limit` deleted keys, the id of the last tombstone read and
+        whether there are more.
+    """
+    if after is None:
+        latest = session.query(func.max(tombstone_model.id)).scalar()
+        return [], latest or 0, False
+
+    query = session.query(tombstone_model.id, tombstone_model.key).filter(
+        tombstone_model.model_name == model_cls.__tablename__,
+        tombstone_model.id > after,
+    )
+    if scopes is not None:
+        scope = tombstone_model.scope
+        query = query.filter(
+            or_(scope.is_(None), scope.in_([_encode(s) for s in scopes]))
+        )
+    rows = query.order_by(tombstone_model.id).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        after = rows[-1][0]
+    return [json.loads(key) for _, key in rows], after, has_more
+
+
+def _encode(value) -> str:
+    return json.dumps(value, default=str)
+
+
+def coerce_change_value(column, value):
+    """Convert a change column value decoded from a cursor back to the column's type.
+
+    :raises ValueError: if `value` doesn't fit the column.
+    """
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if isinstance(value, python_type):
+        return value
+    if python_type in (datetime, date):
+        return python_type.fromisoformat(str(value))
+    try:
+        return python_type(value)
+    except TypeError as e:
+        raise ValueError(str(e))
@@ -0,0 +1,190 @@
+"""Per-app view configuration, resolved and validated once per view class."""
+
+from typing import TYPE_CHECKING, FrozenSet, NamedTuple, Optional, Type
+
+from sqlalchemy import inspect
+
+from smorest_crud.access_control import has_access_rule
+from smorest_crud.loading import check_strategy, split_prefetch_entry
+
+if TYPE_CHECKING:
+    from smorest_crud.view import CRUDView
+
+CHECKS = ("read", "write", "create")
+
+CHECK_METHODS = {check: f"user_can_{check}" for check in CHECKS}
+"""Model method implementing each access check."""
+
+
+class ViewConfig(NamedTuple):
+    """What a view class needs to know about its model on every request."""
+
+    model: type
+    access_checks_enabled: bool
+    """Enabled both by ``CRUD_ACCESS_CHECKS_ENABLED`` and the view."""
+    checks: FrozenSet[str]
+    """Checks the model implements with `user_can_{check}`."""
+    batch_checks: FrozenSet[str]
+    """Checks the model implements with `user_can_{check}_many`."""
+    access_rules: FrozenSet[str]
+    """Checks declared as :class:`smorest_crud.access_rule`."""
+    has_query_for_user: bool
+    key_column: Optional[object]
+    """Attribute identifying items, None if the model has a composite primary key."""
+
+
+class ViewConfigError(Exception):
+    """A CRUD view is misconfigured."""
+
+
+def compile_view_config(crud, view_cls: Type["CRUDView"]) -> ViewConfig:
+    """Resolve and validate the configuration of `view_cls` for the app of `crud`.
+
+    :raises ViewConfigError: if the view can't work as configured.
+    """
+    name = view_cls.__name__
+    model_cls = getattr(view_cls, "model", None)
+    if model_cls is None:
+        raise ViewConfigError(f"{name} has no model")
+    mapper = inspect(model_cls, raiseerr=False)
+    if mapper is None:
+        raise ViewConfigError(f"{name}.model {model_cls!r} is not a mapped class")
+
+    access_checks_enabled = bool(
+        crud.access_control_enabled and view_cls.access_checks_enabled
+    )
+    checks = frozenset(c for c in CHECKS if hasattr(model_cls, CHECK_METHODS[c]))
+    config = ViewConfig(
+        model=model_cls,
+        access_checks_enabled=access_checks_enabled,
+        checks=checks,
+        batch_checks=frozenset(
+            c for c in CHECKS if hasattr(model_cls, f"{CHECK_METHODS[c]}_many")
+        ),
+        access_rules=frozenset(c for c in CHECKS if has_access_rule(model_cls, c)),
+        has_query_for_user=hasattr(model_cls, "query_for_user"),
+        key_column=_key_column(crud, model_cls, mapper),
+    )
+
+    try:
+        for entry in view_cls.prefetch:
+            split_prefetch_entry(entry)
+        check_strategy(view_cls.prefetch_strategy)
+    except ValueError as e:
+        raise ViewConfigError(f"{name}: {e}") from e
+
+    version_column = getattr(view_cls, "version_column", None)
+    if version_column is not None and version_column not in mapper.column_attrs:
+        raise ViewConfigError(
+            f"{name}.version_column {version_column!r} is not a column of {model_cls.__name__}"
+        )
+
+    if access_checks_enabled:
+        for check in _required_checks(view_cls):
+            if check not in checks:
+                raise ViewConfigError(
+                    f"{name} needs {model_cls.__name__}.{CHECK_METHODS[check]}() "
+                    f"because CRUD access checks are enabled"
+                )
+        if _lists(view_cls) and not (
+            config.has_query_for_user or "read" in config.access_rules
+        ):
+            raise ViewConfigError(
+                f"{name} lists {model_cls.__name__} which does not implement "
+                f"query_for_user() and access control checks are enabled"
+            )
+
+    change_column = getattr(view_cls, "change_column", None)
+    if getattr(view_cls, "change_feed_enabled", False) and (
+        change_column not in mapper.column_attrs
+    ):
+        raise ViewConfigError(
+            f"{name}.change_feed_enabled needs change_column set to a column of {model_cls.__name__}"
+        )
+
+    tombstone_scope_column = getattr(view_cls, "tombstone_scope_column", None)
+    if (
+        tombstone_scope_column is not None
+        and tombstone_scope_column not in mapper.column_attrs
+    ):
+        raise ViewConfigError(
+            f"{name}.tombstone_scope_column {tombstone_scope_column!r} is not a column of {model_cls.__name__}"
+        )
+    if access_checks_enabled and getattr(view_cls, "tombstone_model", None) is not None:
+        # tombstones outlive the items, their scope decides who hears of them
+        if tombstone_scope_column is None and _deletes(view_cls):
+            raise ViewConfigError(
+                f"{name} records tombstones without a tombstone_scope_column "
+                f"and access checks are enabled"
+            )
+        if getattr(view_cls, "change_feed_enabled", False) and not _scopes_tombstones(
+            view_cls
+        ):
+            raise ViewConfigError(
+                f"{name} reports deletes of all users, override tombstone_scopes() "
+                f"because access checks are enabled"
+            )
+
+    if config.key_column is None and _needs_key_column(view_cls):
+        raise ViewConfigError(
+            f"{model_cls.__name__} has a composite primary key, set CRUD_DEFAULT_KEY_COLUMN"
+        )
+    return config
+
+
+def _key_column(crud, model_cls, mapper):
+    if hasattr(model_cls, crud.key_attr):
+        return getattr(model_cls, crud.key_attr)
+    if len(mapper.primary_key) != 1:
+        return None
+    return getattr(model_cls, mapper.get_property_by_column(mapper.primary_key[0]).key)
+
+
+def _required_checks(view_cls):
+    flags = (
+        ("get_enabled", "read"),
+        ("list_read_checks_enabled", "read"),
+        ("update_enabled", "write"),
+        ("delete_enabled", "write"),
+        ("bulk_update_enabled", "write"),
+        ("bulk_delete_enabled", "write"),
+        ("create_enabled", "create"),
+    )
+    for flag, check in flags:
+        if getattr(view_cls, flag, False):
+            yield check
+
+
+def _lists(view_cls) -> bool:
+    return any(
+        getattr(view_cls, flag, False)
+        for flag in ("list_enabled", "filtered_lookup_enabled", "multi_get_enabled")
+    )
+
+
+def _deletes(view_cls) -> bool:
+    return any(
+        getattr(view_cls, flag, False)
+        for flag in ("delete_enabled", "bulk_delete_enabled")
+    )
+
+
+def _scopes_tombstones(view_cls) -> bool:
+    from smorest_crud.view import CollectionView
+
+    return view_cls.tombstone_scopes is not CollectionView.tombstone_scopes
+
+
+def _needs_key_column(view_cls) -> bool:
+    return any(
+        getattr(view_cls, flag, False)
+        for flag in (
+            "filtered_lookup_enabled",
+            "fast_update_enabled",
+            "keyset_pagination_enabled",
+            "multi_get_enabled",
+            "bulk_update_enabled",
+            "bulk_delete_enabled",
+            "change_feed_enabled",
+        )
+    )
@@ -0,0 +1,13 @@
+"""Entity tags for conditional requests."""
+
+import hashlib
+import json
+
+
+def make_etag(*parts) -> str:
+    """Compute a strong ETag from JSON-serializable `parts`.
+
+    Parts are e.g. a model name, key and version, or a serialized response body.
+    """
+    raw = json.dumps(parts, separators=(",", ":"), sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
@@ -0,0 +1,198 @@
+"""Bulk export of collections as CSV, Arrow IPC streams or Parquet.
+
+Rows are read in batches through a server-side cursor where the database
+supports one and written out as they arrive, so memory use doesn't grow with
+the size of the collection. Arrow and Parquet need
+`pyarrow <https://arrow.apache.org/docs/python/>`_, e.g. from the ``export``
+extra: ``pip install smorest-crud[export]``.
+"""
+
+import csv
+import io
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional
+
+from marshmallow import Schema, fields
+from sqlalchemy import inspect
+
+from smorest_crud.loading import _nested_field
+from smorest_crud.serialization import _compile_field
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+FORMATS = ("csv", "arrow", "parquet")
+
+MIMETYPES = dict(
+    csv="text/csv",
+    arrow="application/vnd.apache.arrow.stream",
+    parquet="application/vnd.apache.parquet",
+)
+
+
+class ExportColumn(NamedTuple):
+    name: str
+    """Name in the export, the field's ``data_key`` if set."""
+    attr: str
+    """Column attribute of the model."""
+    field: object
+    convert: Optional[Callable]
+    """Converts non-None values like the field's ``serialize()`` would."""
+
+
+def available_formats(formats: Iterable[str]) -> List[str]:
+    """Leave out formats whose libraries aren't installed."""
+    return [f for f in formats if f == "csv" or pyarrow is not None]
+
+
+def export_columns(model, schema: Schema) -> List[ExportColumn]:
+    """Columns of `model` that `schema` dumps as plain fields, in field order.
+
+    Nested and computed fields have no column to export and are left out.
+    """
+    mapper = inspect(model)
+    columns = []
+    for name, field in schema.dump_fields.items():
+        attr = field.attribute or name
+        if attr not in mapper.column_attrs or _nested_field(field) is not None:
+            continue
+        convert = _compile_field(field, nested=False)
+        if convert is False:
+            convert = _field_serializer(field, attr)
+        columns.append(ExportColumn(field.data_key or name, attr, field, convert))
+    return columns
+
+
+def _field_serializer(field, attr):
+    return lambda value: field._serialize(value, attr, None)
+
+
+def convert_rows(columns: List[ExportColumn], rows: Iterable) -> List[list]:
+    """Convert value tuples in column order to serialized values."""
+    converters = [column.convert for column in columns]
+    return [
+        [
+            value if value is None or convert is None else convert(value)
+            for convert, value in zip(converters, row)
+        ]
+        for row in rows
+    ]
+
+
+def batched(items: Iterable, size: int) -> Iterator[List]:
+    """Split `items` into lists of `size`."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def write_csv(columns: List[ExportColumn], batches: Iterable[List]) -> Iterator[str]:
+    """Encode batches of rows as CSV with a header line."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.name for column in columns])
+    for batch in batches:
+        writer.writerows(batch)
+        yield _drain(buffer)
+    yield _drain(buffer)
+
+
+def write_arrow(
+    columns: List[ExportColumn], batches: Iterable[List]
+) -> Iterator[bytes]:
+    """Encode batches of rows as an Arrow IPC stream, one record batch each."""
+    schema = arrow_schema(columns)
+    sink = _Sink()
+    with pyarrow.ipc.new_stream(sink, schema) as writer:
+        for batch in batches:
+            writer.write_batch(_record_batch(schema, batch))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def write_parquet(
+    columns: List[ExportColumn], batches: Iterable[List]
+) -> Iterator[bytes]:
+    """Encode batches of rows as a Parquet file, one row group each."""
+    schema = arrow_schema(columns)
+    sink = _Sink()
+    with pyarrow.parquet.ParquetWriter(sink, schema) as writer:
+        for batch in batches:
+            writer.write_batch(_record_batch(schema, batch))
+            yield sink.drain()
+    yield sink.drain()
+
+
+WRITERS = dict(csv=write_csv, arrow=write_arrow, parquet=write_parquet)
+
+
+def arrow_schema(columns: List[ExportColumn]):
+    """Arrow schema for `columns`, typed by their marshmallow fields.
+
+    Fields other than booleans and numbers become strings, as in JSON."""
+    types = (
+        (fields.Boolean, pyarrow.bool_()),
+        (fields.Integer, pyarrow.int64()),
+        (fields.Float, pyarrow.float64()),
+    )
+    arrow_fields = []
+    for column in columns:
+        arrow_type = pyarrow.string()
+        if not getattr(column.field, "as_string", False):
+            for field_cls, candidate in types:
+                if isinstance(column.field, field_cls):
+                    arrow_type = candidate
+                    break
+        arrow_fields.append(pyarrow.field(column.name, arrow_type))
+    return pyarrow.schema(arrow_fields)
+
+
+def _record_batch(schema, rows: List[list]):
+    arrays = []
+    for i, field in enumerate(schema):
+        values = [row[i] for row in rows]
+        if field.type == pyarrow.string():
+            values = [None if v is None else str(v) for v in values]
+        arrays.append(pyarrow.array(values, type=field.type))
+    return pyarrow.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _drain(buffer: io.StringIO) -> str:
+    data = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return data
+
+
+class _Sink(io.RawIOBase):
+    """Write-only file collecting bytes until drained, keeping track of its position."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
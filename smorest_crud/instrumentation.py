@@ -0,0 +1,209 @@
+"""Per-request performance metrics for CRUD views.
+
+Enabled with ``CRUD_INSTRUMENTATION_ENABLED``. Each view dispatch records its
+query count, SQL time, rows hydrated, and time spent in `query_for_user`, access
+checks, the view itself and (de)serialization. Results are sent as a
+``Server-Timing`` header, passed to ``CRUD_METRICS_CALLBACK`` and aggregated
+into per-endpoint histograms in :attr:`smorest_crud.CRUD.metrics`.
+"""
+
+from contextlib import contextmanager
+from functools import wraps
+from threading import Lock
+from time import perf_counter
+from typing import Callable, Dict, Optional
+
+from flask import current_app, g, has_app_context, make_response, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Mapper
+
+TIMINGS = ("query_for_user", "sql", "access", "view", "dump", "total")
+"""Timings recorded per request, in seconds."""
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+"""Upper bounds of histogram buckets, in seconds."""
+
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 1000)
+"""Upper bounds of histogram buckets for query and row counts."""
+
+
+class RequestMetrics(object):
+    """Counters and timings of one view dispatch.
+
+    ``view`` is time spent in CRUD view methods. ``dump`` is serialization done
+    by the view plus everything outside it (argument loading and response
+    dumping by flask-smorest). Lazy loads while dumping count towards ``sql`` too.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.rows = 0
+        self.timings = dict.fromkeys(TIMINGS, 0.0)
+        self.in_view = False
+
+    def as_dict(self) -> dict:
+        return dict(self.timings, queries=self.queries, rows=self.rows)
+
+    def server_timing(self) -> str:
+        """Format as a ``Server-Timing`` header value, durations in milliseconds."""
+        entries = []
+        for name in TIMINGS:
+            entry = f"{name};dur={self.timings[name] * 1000:.2f}"
+            if name == "sql":
+                entry += f';desc="{self.queries} queries"'
+            entries.append(entry)
+        entries.append(f'rows;desc="{self.rows}"')
+        return ", ".join(entries)
+
+
+class Histogram(object):
+    """Counts of observed values per bucket, with their count and sum."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def as_dict(self) -> dict:
+        bounds = [str(bound) for bound in self.buckets] + ["+Inf"]
+        return dict(
+            buckets=dict(zip(bounds, self.counts)), count=self.count, sum=self.sum
+        )
+
+
+class EndpointMetrics(object):
+    """Histograms of request metrics per endpoint."""
+
+    def __init__(self):
+        self._histograms: Dict[str, Dict[str, Histogram]] = {}
+        self._lock = Lock()
+
+    def observe(self, endpoint: str, metrics: RequestMetrics):
+        values = metrics.as_dict()
+        with self._lock:
+            histograms = self._histograms.setdefault(endpoint, {})
+            for name in TIMINGS:
+                histograms.setdefault(name, Histogram()).observe(values[name])
+            for name in ("queries", "rows"):
+                histograms.setdefault(name, Histogram(COUNT_BUCKETS)).observe(
+                    values[name]
+                )
+
+    def snapshot(self) -> Dict[str, Dict[str, dict]]:
+        """Histograms by endpoint and metric name."""
+        with self._lock:
+            return {
+                endpoint: {name: h.as_dict() for name, h in histograms.items()}
+                for endpoint, histograms in self._histograms.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+def current_metrics() -> Optional[RequestMetrics]:
+    """Metrics of the view being dispatched, if instrumented."""
+    if not has_app_context():
+        return None
+    return g.get("crud_metrics")
+
+
+@contextmanager
+def timed(name: str):
+    """Add the time spent in the block to timing `name` of the current request."""
+    metrics = current_metrics()
+    if metrics is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        metrics.timings[name] += perf_counter() - start
+
+
+def timed_view(method: Callable) -> Callable:
+    """Record time spent in a CRUD view method as ``view``."""
+
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        metrics = current_metrics()
+        if metrics is None or metrics.in_view:
+            return method(*args, **kwargs)
+        metrics.in_view = True
+        try:
+            with timed("view"):
+                return method(*args, **kwargs)
+        finally:
+            metrics.in_view = False
+
+    return wrapper
+
+
+def dispatch_instrumented(dispatch: Callable, *args, **kwargs):
+    """Call view `dispatch`, recording and reporting :class:`RequestMetrics`."""
+    metrics = g.crud_metrics = RequestMetrics()
+    start = perf_counter()
+    try:
+        rv = dispatch(*args, **kwargs)
+    finally:
+        g.pop("crud_metrics", None)
+        timings = metrics.timings
+        timings["total"] = perf_counter() - start
+        timings["dump"] += max(timings["total"] - timings["view"], 0.0)
+        _report(metrics)
+
+    response = make_response(rv)
+    response.headers["Server-Timing"] = metrics.server_timing()
+    return response
+
+
+def _report(metrics: RequestMetrics):
+    crud = current_app.extensions["crud"]
+    endpoint = request.endpoint or request.path
+    crud.metrics.observe(endpoint, metrics)
+    if crud.metrics_callback is not None:
+        crud.metrics_callback(endpoint, metrics.as_dict())
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_metrics() is not None:
+        conn.info.setdefault("crud_query_start", []).append(perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    metrics = current_metrics()
+    starts = conn.info.get("crud_query_start")
+    if metrics is None or not starts:
+        return
+    metrics.queries += 1
+    metrics.timings["sql"] += perf_counter() - starts.pop()
+
+
+def _count_row(target, context):
+    metrics = current_metrics()
+    if metrics is not None:
+        metrics.rows += 1
+
+
+def listen_for_metrics():
+    """Time queries of all engines and count hydrated rows of all mappers."""
+    for target, name, listener in (
+        (Engine, "before_cursor_execute", _before_cursor_execute),
+        (Engine, "after_cursor_execute", _after_cursor_execute),
+        (Mapper, "load", _count_row),
+    ):
+        if not event.contains(target, name, listener):
+            event.listen(target, name, listener)
@@ -0,0 +1,108 @@
+"""Detect relationships lazy loaded while dispatching CRUD views.
+
+Enabled with ``CRUD_LAZY_LOAD_DETECTION`` set to ``"warn"`` or ``"raise"``, meant
+for development and tests: baked queries are disabled during detection.
+Lazy loads are counted per relationship through the objects they load, so lazy
+loads finding nothing aren't counted, and neither are lazy loads of streamed
+responses.
+"""
+
+from collections import Counter
+from typing import Callable, Dict, Tuple
+import warnings
+
+from flask import g, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Mapper
+
+from smorest_crud import _crud
+
+MODES = ("warn", "raise")
+
+
+class LazyLoadWarning(UserWarning):
+    """A view lazy loaded a relationship more often than allowed."""
+
+
+class LazyLoadError(Exception):
+    """A view lazy loaded a relationship more often than allowed."""
+
+
+def dispatch_detecting(view, dispatch: Callable, *args, **kwargs):
+    """Call view `dispatch`, then warn or raise if relationships were lazy loaded too often."""
+    loads = g.crud_lazy_loads = {}
+    # baked lazy loads don't tell the loaded objects where they come from
+    sessions = {view._db.session(), view._read_session()()}
+    baked = {session: session.enable_baked_queries for session in sessions}
+    for session in sessions:
+        session.enable_baked_queries = False
+    try:
+        rv = dispatch(*args, **kwargs)
+    finally:
+        g.pop("crud_lazy_loads", None)
+        for session, enabled in baked.items():
+            session.enable_baked_queries = enabled
+
+    counts = Counter({path: len(parents) for path, parents in loads.items()})
+    excessive = [
+        (path, count)
+        for path, count in counts.most_common()
+        if count > _crud.lazy_load_threshold
+    ]
+    if excessive:
+        message = _describe(type(view), excessive)
+        if _crud.lazy_load_detection == "raise":
+            raise LazyLoadError(message)
+        warnings.warn(message, LazyLoadWarning)
+    return rv
+
+
+def _describe(view_cls, excessive) -> str:
+    lines = [f"{view_cls.__name__} lazy loaded relationships:"]
+    for path, count in excessive:
+        lines.append(f"  {' -> '.join(path)}: {count} times")
+    suggestion = ", ".join(_prefetch_entry(path) for path, count in excessive)
+    lines.append(f"add them to {view_cls.__name__}.prefetch: [{suggestion}]")
+    return "\n".join(lines)
+
+
+def _prefetch_entry(path: Tuple[str, ...]) -> str:
+    if len(path) == 1:
+        return path[0]
+    return f"({', '.join(path)})"
+
+
+def _record_lazy_load(target, context):
+    if not has_app_context():
+        return
+    loads: Dict = g.get("crud_lazy_loads")
+    parent = context.query.lazy_loaded_from
+    if loads is None or parent is None:
+        return
+
+    rel = _loading_relationship(parent, inspect(target).mapper)
+    if rel is None:
+        return
+    path = _load_path(parent) + (f"{rel.parent.class_.__name__}.{rel.key}",)
+    loads.setdefault(path, set()).add(id(parent))
+
+
+def _loading_relationship(parent, mapper):
+    """Find the relationship of state `parent` being loaded with instances of `mapper`."""
+    for rel in parent.mapper.relationships:
+        if rel.key not in parent.dict and mapper.isa(rel.mapper):
+            return rel
+    return None
+
+
+def _load_path(state) -> Tuple[str, ...]:
+    """Relationships through which `state` was loaded, e.g. ``("Human.pets",)``."""
+    path = getattr(state, "load_path", None)
+    props = path.path[1::2] if path is not None else ()
+    return tuple(f"{prop.parent.class_.__name__}.{prop.key}" for prop in props)
+
+
+def listen_for_lazy_loads():
+    """Record lazy loads of all mappers."""
+    if not event.contains(Mapper, "load", _record_lazy_load):
+        event.listen(Mapper, "load", _record_lazy_load)
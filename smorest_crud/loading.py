@@ -0,0 +1,230 @@
+"""Build SQLAlchemy loader options for view prefetch settings."""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from marshmallow import Schema, fields
+from sqlalchemy import inspect
+from sqlalchemy.orm import (
+    joinedload,
+    selectinload,
+    subqueryload,
+    raiseload,
+    defaultload,
+    load_only,
+)
+from sqlalchemy.orm.exc import UnmappedColumnError
+from sqlalchemy.orm.interfaces import MANYTOONE
+
+LOADERS = {
+    "joined": joinedload,
+    "selectin": selectinload,
+    "subquery": subqueryload,
+    "raise": raiseload,
+}
+
+STRATEGIES = tuple(LOADERS) + ("auto",)
+"""Loader strategies accepted in `prefetch` entries and `prefetch_strategy`."""
+
+
+def split_prefetch_entry(entry) -> Tuple[List, Optional[str]]:
+    """Split a `prefetch` entry into its relationship chain and loader strategy.
+
+    Entries are a relationship, a chain of relationships, or a chain
+    ending in a strategy name, e.g. ``(Pet.human, Human.cars, "selectin")``.
+    """
+    if not _is_listy(entry):
+        return [entry], None
+
+    rels = list(entry)
+    strategy = None
+    if rels and isinstance(rels[-1], str):
+        strategy = rels.pop()
+        check_strategy(strategy)
+    if not rels:
+        raise ValueError(f"prefetch entry {entry!r} has no relationships")
+    return rels, strategy
+
+
+def check_strategy(strategy: str):
+    if strategy not in STRATEGIES:
+        raise ValueError(
+            f"unknown prefetch strategy {strategy!r}, expected one of {STRATEGIES}"
+        )
+
+
+def resolve_strategy(strategy: str, rel) -> str:
+    """Resolve ``auto`` to a concrete strategy for relationship `rel`.
+
+    Many-to-one and scalar relationships are joined, collections are loaded
+    with a separate ``SELECT ... IN`` to avoid multiplying parent rows.
+    """
+    check_strategy(strategy)
+    if strategy != "auto":
+        return strategy
+    if rel.property.direction is MANYTOONE or not is_collection(rel):
+        return "joined"
+    return "selectin"
+
+
+def loader_chain(rels: Iterable, strategies: Iterable[str]):
+    """Chain loader options for a relationship path, one strategy per hop."""
+    opts = None
+    for rel, strategy in zip(rels, strategies):
+        loader = LOADERS[strategy]
+        if opts is None:
+            opts = loader(rel)
+        else:
+            opts = getattr(opts, loader.__name__)(rel)
+    return opts
+
+
+def schema_prefetch_paths(model, schema: Schema, max_depth: int = 3) -> List[Tuple]:
+    """Find the relationship paths of `model` that dumping `schema` will touch.
+
+    Follows ``Nested`` fields (honoring ``only``/``exclude``) that map onto
+    relationships, down to `max_depth` levels.
+    """
+    paths = []
+
+    def walk(model, schema, path):
+        relationships = inspect(model).relationships
+        for name, field in schema.dump_fields.items():
+            nested = _nested_field(field)
+            if nested is None:
+                continue
+            attr = field.attribute or name
+            if attr not in relationships:
+                continue
+
+            rel_path = path + (getattr(model, attr),)
+            paths.append(rel_path)
+            if len(rel_path) < max_depth:
+                walk(relationships[attr].mapper.class_, nested.schema, rel_path)
+
+    walk(model, schema, ())
+    return paths
+
+
+def schema_column_plan(
+    model, schema: Schema, max_depth: int = 3
+) -> Dict[Tuple[str, ...], Optional[Set[str]]]:
+    """Find the columns dumping `schema` reads, per relationship path of `model`.
+
+    Maps relationship key paths (``()`` being `model` itself) to the column
+    attribute keys to load, or None if a field reads something that isn't a
+    plain column and the entity has to be loaded in full.
+    """
+    plan = {}
+
+    def walk(model, schema, path):
+        mapper = inspect(model)
+        columns = set(_column_keys(mapper, mapper.primary_key))
+        projectable = True
+        for name, field in schema.dump_fields.items():
+            attr = field.attribute or name
+            nested = _nested_field(field)
+            if attr in mapper.column_attrs and nested is None:
+                columns.add(attr)
+            elif attr in mapper.relationships and nested is not None:
+                rel = mapper.relationships[attr]
+                parent_columns, child_columns = relationship_columns(rel)
+                columns.update(parent_columns)
+                child_path = path + (attr,)
+                if len(child_path) <= max_depth:
+                    walk(rel.mapper.class_, nested.schema, child_path)
+                    if plan[child_path] is not None:
+                        plan[child_path].update(child_columns)
+            else:
+                # computed value, we can't tell which columns it reads
+                projectable = False
+        plan[path] = columns if projectable else None
+
+    walk(model, schema, ())
+    return plan
+
+
+def relationship_columns(rel) -> Tuple[List[str], List[str]]:
+    """Column keys a relationship needs loaded on its parent and child to be loaded."""
+    parent = _column_keys(rel.parent, rel.local_columns)
+    child = _column_keys(rel.mapper, rel.remote_side)
+    return parent, child
+
+
+def projection_options(model, plan: Dict[Tuple[str, ...], Optional[Set[str]]]):
+    """Build ``load_only`` options for a plan from :func:`schema_column_plan`."""
+    opts = []
+    for path, columns in plan.items():
+        if columns is None:
+            continue
+        if not path:
+            opts.append(load_only(*sorted(columns)))
+            continue
+
+        chain = None
+        for rel in path_attributes(model, path):
+            chain = defaultload(rel) if chain is None else chain.defaultload(rel)
+        opts.append(chain.load_only(*sorted(columns)))
+    return opts
+
+
+def path_attributes(model, path: Sequence[str]) -> List:
+    """Resolve a path of relationship keys to relationship attributes."""
+    attrs = []
+    for key in path:
+        attr = getattr(model, key)
+        attrs.append(attr)
+        model = attr.property.mapper.class_
+    return attrs
+
+
+def narrow_schema(schema: Schema, only: Sequence[str]) -> Schema:
+    """Copy `schema`, dumping only the (possibly dotted) field names in `only`.
+
+    :raises ValueError: if a field doesn't exist on the schema.
+    """
+    for name in only:
+        current = schema
+        for part in name.split("."):
+            field = current.dump_fields.get(part) if current is not None else None
+            if field is None:
+                raise ValueError(f"Invalid field: {name}")
+            nested = _nested_field(field)
+            current = nested.schema if nested is not None else None
+
+    return type(schema)(
+        only=only,
+        exclude=schema.exclude,
+        many=schema.many,
+        context=schema.context,
+        load_only=schema.load_only,
+        dump_only=schema.dump_only,
+    )
+
+
+def _column_keys(mapper, columns) -> List[str]:
+    keys = []
+    for column in columns:
+        try:
+            keys.append(mapper.get_property_by_column(column).key)
+        except UnmappedColumnError:
+            # e.g. columns of a secondary table
+            pass
+    return keys
+
+
+def _nested_field(field) -> Optional[fields.Nested]:
+    """Return the ``Nested`` field of `field` or of its ``List`` item, if any."""
+    if isinstance(field, fields.List):
+        field = field.inner
+    if isinstance(field, fields.Nested):
+        return field
+    return None
+
+
+def is_collection(rel) -> bool:
+    """Whether a relationship attribute loads a list of items (one-to-many, many-to-many)."""
+    return rel.property.uselist
+
+
+def _is_listy(thing) -> bool:
+    t = type(thing)
+    return t is list or t is tuple or t is set
@@ -0,0 +1,26 @@
+"""Opaque cursor tokens for keyset pagination."""
+
+import base64
+import json
+from typing import Sequence, List
+
+
+def encode_cursor(values: Sequence) -> str:
+    """Encode the key values of the last row on a page into an opaque cursor."""
+    raw = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List:
+    """Decode a cursor produced by :func:`encode_cursor`.
+
+    :raises ValueError: if the cursor is malformed.
+    """
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid cursor: {cursor!r}")
+    if not isinstance(values, list):
+        raise ValueError(f"invalid cursor: {cursor!r}")
+    return values
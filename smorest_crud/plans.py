@@ -0,0 +1,57 @@
+"""Caches of query construction shared by all instances of a view class."""
+
+from threading import Lock
+from typing import Callable, Hashable
+
+from sqlalchemy.ext import baked
+
+
+class PlanCache(object):
+    """Values built once per key, such as loader options per view class and method.
+
+    Counts hits and misses so the saving can be measured, see
+    :meth:`smorest_crud.CRUD.plan_cache_info`.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, build: Callable):
+        """Return the value for `key`, calling `build()` to make it on a miss."""
+        try:
+            value = self._values[key]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            return value
+
+        value = build()
+        with self._lock:
+            self.misses += 1
+            return self._values.setdefault(key, value)
+
+    def info(self) -> dict:
+        """Hit and miss counts, hit rate and number of cached values."""
+        total = self.hits + self.misses
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            hit_rate=self.hits / total if total else 0.0,
+            size=len(self._values),
+        )
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+            self.hits = self.misses = 0
+
+
+plan_cache = PlanCache()
+"""Loader options, response schemas and baked lookups of view classes."""
+
+bakery = baked.bakery()
+"""Compiled SQL of baked lookup queries, see :meth:`ResourceView._lookup`."""
@@ -0,0 +1,105 @@
+"""Route reads of CRUD views to read replicas."""
+
+from itertools import cycle
+from threading import Lock
+from typing import TYPE_CHECKING, List, Optional
+import json
+import time
+
+from flask import g, request
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy import SQLAlchemy
+
+if TYPE_CHECKING:
+    from smorest_crud.cache import CacheBackend
+
+SAFE_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+STICKY_KEY_PREFIX = "crud_primary_until:"
+
+
+class ReplicaRouter(object):
+    """Hand out sessions for the binds in ``CRUD_REPLICA_BINDS``, round-robin per request.
+
+    Reads go to the primary during unsafe requests, and for ``sticky_seconds``
+    after a client's successful write so it reads its own writes. Clients are
+    recognized by their JWT identity, or their address for requests without a
+    token, and the time they stay on the primary is kept in `sticky_store`. The
+    default in-process store works for a single server process; pass a
+    :class:`smorest_crud.cache.CacheBackend` shared by all of them otherwise.
+    """
+
+    def __init__(
+        self,
+        db: SQLAlchemy,
+        app,
+        binds: List[str],
+        sticky_seconds: float,
+        sticky_store: Optional["CacheBackend"] = None,
+    ):
+        if not binds:
+            raise ValueError("no replica binds configured")
+        missing = set(binds) - set(app.config.get("SQLALCHEMY_BINDS") or {})
+        if missing:
+            raise Exception(
+                f"replica binds {sorted(missing)} not found in SQLALCHEMY_BINDS"
+            )
+
+        self.binds = list(binds)
+        self.sticky_seconds = sticky_seconds
+        if sticky_store is None:
+            from smorest_crud.cache import LRUCache
+
+            sticky_store = LRUCache(maxsize=65536, ttl=sticky_seconds)
+        self.sticky_store = sticky_store
+        # empty binds, or tables would map back to the primary engine
+        self.sessions = [
+            db.create_scoped_session(
+                options=dict(bind=db.get_engine(app, bind=bind), binds={})
+            )
+            for bind in self.binds
+        ]
+        self._next = cycle(range(len(self.sessions)))
+        self._lock = Lock()
+
+    def use_replica(self) -> bool:
+        """Whether reads of the current request may go to a replica."""
+        if request.method not in SAFE_METHODS:
+            return False
+        if not self.sticky_seconds:
+            return True
+        return (self.sticky_store.get(self._client_key()) or 0) < time.time()
+
+    def _client_key(self) -> str:
+        identity = get_jwt_identity()
+        if identity is None:
+            client = f"addr:{request.remote_addr}"
+        else:
+            client = "jwt:" + json.dumps(identity, sort_keys=True, default=str)
+        return STICKY_KEY_PREFIX + client
+
+    def session(self):
+        """Replica session for the current request."""
+        if "crud_replica" not in g:
+            with self._lock:
+                g.crud_replica = next(self._next)
+        return self.sessions[g.crud_replica]
+
+    def after_request(self, response):
+        """Pin the client to the primary after it wrote something."""
+        if (
+            self.sticky_seconds
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            self.sticky_store.set(self._client_key(), time.time() + self.sticky_seconds)
+        return response
+
+    def release(self, *args):
+        """Forget the replica picked for the request."""
+        g.pop("crud_replica", None)
+
+    def remove(self, *args):
+        """Close replica sessions at the end of the app context."""
+        for session in self.sessions:
+            session.remove()
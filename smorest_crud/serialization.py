@@ -0,0 +1,149 @@
+"""Compiled serializers for response schemas of plain columns.
+
+:func:`compile_dumper` turns a marshmallow schema into a function building the
+same dicts as ``schema.dump()``, reading attributes straight from the instance
+dict of loaded items instead of going through every field's ``serialize()``.
+Schemas it can't reproduce exactly - with hooks, ``Method``/``Function`` or
+custom fields, or ``Nested`` fields more than one level deep - aren't compiled
+and views fall back to marshmallow.
+
+Responses are encoded with `orjson <https://github.com/ijl/orjson>`_ if it is
+installed, e.g. with the ``fast`` extra: ``pip install smorest-crud[fast]``.
+"""
+
+from typing import Any, Callable, List, Optional, Tuple
+
+from flask import Response, current_app, json
+from marshmallow import Schema, fields, missing
+from marshmallow.decorators import POST_DUMP, PRE_DUMP
+from marshmallow.utils import ensure_text_type
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# fields whose _serialize() only looks at the value
+_SIMPLE_FIELDS = (
+    fields.Date,
+    fields.DateTime,
+    fields.Decimal,
+    fields.Email,
+    fields.Time,
+    fields.Url,
+    fields.UUID,
+)
+
+Dumper = Callable[[Any], Any]
+
+
+def compile_dumper(schema: Schema) -> Optional[Dumper]:
+    """Compile `schema` into a function returning the same as ``schema.dump(obj)``.
+
+    :returns: None if the schema needs marshmallow to be dumped.
+    """
+    dump_one = _compile_schema(schema, nested=True)
+    if dump_one is None:
+        return None
+    if schema.many:
+        return lambda items: [dump_one(item) for item in items]
+    return dump_one
+
+
+def _compile_schema(schema: Schema, nested: bool) -> Optional[Callable]:
+    if (
+        schema._has_processors(PRE_DUMP)
+        or schema._has_processors(POST_DUMP)
+        or type(schema).get_attribute is not Schema.get_attribute
+    ):
+        return None
+
+    plan: List[Tuple[str, str, Optional[Callable]]] = []
+    for name, field in schema.dump_fields.items():
+        attr = field.attribute or name
+        if "." in attr or field.default is not missing:
+            return None
+        convert = _compile_field(field, nested)
+        if convert is False:
+            return None
+        plan.append((field.data_key or name, attr, convert))
+
+    def dump_one(obj):
+        # loaded columns are in the instance dict, skip the attribute descriptors
+        values = obj if isinstance(obj, dict) else getattr(obj, "__dict__", {})
+        out = {}
+        for key, attr, convert in plan:
+            if attr in values:
+                value = values[attr]
+            else:
+                value = getattr(obj, attr, missing)
+                if value is missing:
+                    continue
+            if value is None or convert is None:
+                out[key] = value
+            else:
+                out[key] = convert(value)
+        return out
+
+    return dump_one
+
+
+def _compile_field(field: fields.Field, nested: bool):
+    """Return a converter for non-None values of `field`, None for no conversion.
+
+    :returns: False if `field` can't be compiled.
+    """
+    field_type = type(field)
+    if field_type is fields.Raw:
+        return None
+    if field_type is fields.String:
+        return _text
+    if field_type in (fields.Integer, fields.Float) and not field.as_string:
+        return field.num_type
+    if field_type is fields.Boolean:
+        truthy, falsy = field.truthy, field.falsy
+        return lambda v: True if v in truthy else False if v in falsy else bool(v)
+    if field_type in _SIMPLE_FIELDS:
+        serialize = field._serialize
+        return lambda v: serialize(v, None, None)
+
+    many = False
+    if field_type is fields.List:
+        field, many = field.inner, True
+        field_type = type(field)
+    if field_type is fields.Nested and nested:
+        many = many or field.many
+        dump_one = _compile_schema(field.schema, nested=False)
+        if dump_one is None:
+            return False
+        if many:
+            return lambda items: [dump_one(item) for item in items]
+        return dump_one
+    return False
+
+
+def _text(value) -> str:
+    return value if type(value) is str else ensure_text_type(value)
+
+
+def encode_json(data) -> bytes:
+    """Encode `data` like :func:`flask.jsonify` would, with orjson if available."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if current_app.config["JSON_SORT_KEYS"]:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(data, option=option)
+        except TypeError:
+            # a type only the app's JSON encoder knows
+            pass
+    return json.dumps(data).encode()
+
+
+def json_response(data, status: int = 200) -> Response:
+    """Build a JSON response of `data` encoded with :func:`encode_json`."""
+    return Response(
+        encode_json(data),
+        status=status,
+        mimetype=current_app.config["JSONIFY_MIMETYPE"],
+    )
@@ -1,6 +1,6 @@
 from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
-from smorest_crud import ResourceView, CRUD, CollectionView
+from smorest_crud import ResourceView, CRUD, CollectionView, BulkCollectionMixin
 from flask_smorest import Api, Blueprint, abort
 from marshmallow import fields as f, Schema
 from sqlalchemy import inspect
@@ -9,7 +9,7 @@ from flask_jwt_extended import JWTManager
 
 db = SQLAlchemy()
 
-from smorest_crud.test.app.model import Pet, Human, Car
+from smorest_crud.test.app.model import Pet, Human, Car, Toy, Tombstone
 
 api = Api()
 debug = bool(os.getenv("DEBUG"))
@@ -17,7 +17,7 @@ debug = bool(os.getenv("DEBUG"))
 USER_NAME = "mischa"
 
 
-def create_app() -> Flask:
+def create_app(config: dict = None) -> Flask:
     app = Flask("CRUDTest")
     app.config.update(
         OPENAPI_VERSION="3.0.2",
@@ -28,14 +28,16 @@ def create_app() -> Flask:
         CRUD_ACCESS_CHECKS_ENABLED=True,
         SECRET_KEY="wnt2die",
     )
+    if config:
+        app.config.update(config)
     JWTManager(app)
     db.init_app(app)
     api.init_app(app)
-    CRUD(app)
+    crud = CRUD(app)
 
-    app.register_blueprint(pet_blp)
-    app.register_blueprint(human_blp)
-    app.register_blueprint(pointless_blp)
+    crud.register_blueprint(pet_blp)
+    crud.register_blueprint(human_blp)
+    crud.register_blueprint(pointless_blp)
 
     return app
 
@@ -62,6 +64,17 @@ class CarSchema(Schema):
     id = f.Integer()
 
 
+class ToySchema(Schema):
+    id = f.Integer(dump_only=True)
+    name = f.String()
+
+
+class ToyBulkSchema(Schema):
+    keys = f.List(f.Integer())
+    filter = f.Dict()
+    values = f.Nested(ToySchema)
+
+
 pet_blp = Blueprint("pets", "pets", url_prefix="/pet")
 
 
@@ -95,6 +108,51 @@ class PetCollection(CollectionView):
         return super().post(args)
 
 
+@pet_blp.route("/paged")
+class PetPagedCollection(CollectionView):
+    model = Pet
+    prefetch = [Pet.human, (Pet.human, Human.cars)]
+    access_checks_enabled = False
+
+    list_enabled = True
+    keyset_pagination_enabled = True
+    page_size = 4
+
+    @pet_blp.response(PetSchema(many=True))
+    def get(self):
+        return super().get()
+
+
+@pet_blp.route("/stream")
+class PetStreamCollection(CollectionView):
+    model = Pet
+    prefetch = [Pet.human]
+    access_checks_enabled = False
+
+    list_enabled = True
+    streaming_enabled = True
+    stream_batch_size = 3
+
+    @pet_blp.response(PetSchema(many=True))
+    def get(self):
+        return super().get()
+
+
+@pet_blp.route("/bulk")
+class PetBulkCollection(CollectionView):
+    model = Pet
+    access_checks_enabled = False
+
+    create_enabled = True
+    bulk_create_enabled = True
+    bulk_create_chunk_size = 2
+
+    @pet_blp.arguments(PetSchema(many=True))
+    @pet_blp.response(PetSchema(many=True))
+    def post(self, args):
+        return super().post(args)
+
+
 @pet_blp.route("/<int:pk>")
 class PetResource(ResourceView):
     model = Pet
@@ -141,6 +199,68 @@ class HumanCollection(CollectionView):
         return super().post(args)
 
 
+@human_blp.route("/bulk")
+class HumanBulkCollection(CollectionView):
+    model = Human
+
+    create_enabled = True
+    bulk_create_enabled = True
+    bulk_create_return_keys = True
+
+    @human_blp.arguments(HumanSchema(many=True))
+    @human_blp.response(HumanSchema(many=True))
+    def post(self, args):
+        return super().post(args)
+
+
+@human_blp.route("/readable")
+class ReadableHumanCollection(CollectionView):
+    model = Human
+
+    list_enabled = True
+    list_read_checks_enabled = True
+
+    @human_blp.response(HumanSchema(many=True))
+    def get(self):
+        return super().get()
+
+
+@human_blp.route("/projected")
+class ProjectedHumanCollection(CollectionView):
+    model = Human
+    prefetch_from_schema = True
+    prefetch_strategy = "auto"
+    column_projection_enabled = True
+    sparse_fields_enabled = True
+
+    list_enabled = True
+    multi_get_enabled = True
+
+    @human_blp.response(HumanSchema(many=True))
+    def get(self):
+        return super().get()
+
+
+@human_blp.route("/projected/<int:pk>")
+class ProjectedHumanResource(ResourceView):
+    model = Human
+    prefetch_from_schema = True
+    column_projection_enabled = True
+    sparse_fields_enabled = True
+
+    update_enabled = True
+    get_enabled = True
+
+    @human_blp.response(HumanSchema)
+    def get(self, pk):
+        return super().get(pk)
+
+    @human_blp.arguments(HumanSchema)
+    @human_blp.response(HumanSchema)
+    def patch(self, args, pk):
+        return super().patch(args, pk)
+
+
 @human_blp.route("/<int:pk>")
 class HumanResource(ResourceView):
     model = Human
@@ -185,6 +305,75 @@ class CarCollection(CollectionView):
         return super().get()
 
 
+@human_blp.route("/car/<int:pk>")
+class CarResource(ResourceView):
+    model = Car
+
+    get_enabled = True
+    filtered_lookup_enabled = True
+
+    @human_blp.response(CarSchema)
+    def get(self, pk):
+        return super().get(pk)
+
+
+@human_blp.route("/toy")
+class ToyCollection(BulkCollectionMixin, CollectionView):
+    model = Toy
+    tombstone_model = Tombstone
+    tombstone_scope_column = "owner_id"
+
+    list_enabled = True
+    bulk_update_enabled = True
+    bulk_delete_enabled = True
+    bulk_chunk_size = 2
+    change_feed_enabled = True
+    change_column = "updated_at"
+
+    def tombstone_scopes(self):
+        return [self._get_current_user().id]
+
+    @human_blp.response(ToySchema(many=True))
+    def get(self):
+        return super().get()
+
+    @human_blp.arguments(ToyBulkSchema)
+    @human_blp.response()
+    def patch(self, args):
+        return super().patch(args)
+
+    @human_blp.arguments(ToyBulkSchema)
+    @human_blp.response()
+    def delete(self, args):
+        return super().delete(args)
+
+
+@human_blp.route("/toy/<int:pk>")
+class ToyResource(ResourceView):
+    model = Toy
+    tombstone_model = Tombstone
+    tombstone_scope_column = "owner_id"
+
+    get_enabled = True
+    update_enabled = True
+    delete_enabled = True
+    filtered_lookup_enabled = True
+    fast_update_enabled = True
+
+    @human_blp.response(ToySchema)
+    def get(self, pk):
+        return super().get(pk)
+
+    @human_blp.arguments(ToySchema)
+    @human_blp.response(ToySchema)
+    def patch(self, args, pk):
+        return super().patch(args, pk)
+
+    @human_blp.response(ToySchema)
+    def delete(self, pk):
+        return super().delete(pk)
+
+
 def is_rel_loaded(item, attr_name):
     """Test if a relationship was prefetched."""
     ins = inspect(item)
@@ -1,10 +1,12 @@
+from datetime import datetime
 from typing import Optional, Type
 
 from smorest_crud.access_control.models import T
 from smorest_crud.test.app import db
-from sqlalchemy import Column, Integer, Text, ForeignKey
+from sqlalchemy import Column, DateTime, Integer, Text, ForeignKey, literal_column
 from sqlalchemy.orm import relationship
-from smorest_crud import AccessControlUser, AccessControlQuery
+from smorest_crud import AccessControlUser, AccessControlQuery, access_rule
+from smorest_crud.changes import TombstoneMixin
 from flask_sqlalchemy import BaseQuery
 
 
@@ -16,7 +18,7 @@ class Pet(db.Model):  # noqa: T484
 
     human_id = Column(ForeignKey("human.id"))
     human = relationship("Human", back_populates="pets")
-    cars = relationship("Car", secondary="human")
+    cars = relationship("Car", secondary="human", viewonly=True)
 
     @classmethod
     def query_for_user(cls, user) -> BaseQuery:
@@ -59,3 +61,25 @@ class Car(db.Model, AccessControlUser):  # noqa: T484
 
     def user_can_write(self, user: "AccessControlUser") -> bool:
         return True
+
+
+class Toy(db.Model, AccessControlUser):  # noqa: T484
+    id = Column(Integer, primary_key=True)
+    name = Column(Text)
+    version = Column(
+        Integer, nullable=False, default=1, onupdate=literal_column("version") + 1
+    )
+    updated_at = Column(
+        DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    owner_id = Column(ForeignKey("human.id"))
+    owner = relationship("Human")
+
+    @access_rule
+    def user_can_write(self, user) -> bool:
+        return self.owner_id == user.id
+
+
+class Tombstone(db.Model, TombstoneMixin):  # noqa: T484
+    pass
@@ -0,0 +1,376 @@
+"""Benchmark CRUD endpoints of the test app on a large file-backed SQLite database.
+
+Seeds ``--rows`` pets (a fifth as many humans, each with a car), then measures
+latency, throughput and queries per request of list, get, patch, delete, create
+and access-checked endpoints, and the time to serialize a list of pets with
+marshmallow versus a compiled serializer (``fast_serialization_enabled``). Results are written as JSON and can be compared
+against a baseline::
+
+    python -m smorest_crud.test.benchmark --rows 100000 --output before.json
+    # ... change things ...
+    python -m smorest_crud.test.benchmark --rows 100000 --compare before.json
+
+Comparing exits with status 1 if a scenario got slower than ``--threshold``.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, NamedTuple
+
+import sqlalchemy
+from flask import Flask, jsonify
+from flask.testing import FlaskClient
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import joinedload
+
+from smorest_crud.serialization import compile_dumper, json_response
+from smorest_crud.test.app import USER_NAME, PetSchema, create_app, db
+from smorest_crud.test.app.model import Car, Human, Pet
+
+SEED_CHUNK_SIZE = 10000
+DUMP_ROWS = 1000
+
+
+class Scenario(NamedTuple):
+    name: str
+    description: str
+    request: Callable[[FlaskClient, int], object]
+    """Make the ``n``-th request of the scenario, returning the response."""
+
+
+def build_scenarios(humans: int, pets: int) -> List[Scenario]:
+    rng = random.Random(0)
+
+    def pet_id(n):
+        return rng.randint(1, pets // 2)
+
+    def human_id(n):
+        return rng.randint(1, humans)
+
+    def doomed_pet_id(n):
+        # deleted from the end, so other scenarios don't hit missing pets
+        return pets - n
+
+    return [
+        Scenario(
+            "list_pets_paged",
+            "PetPagedCollection: keyset page of 100 pets with their humans",
+            lambda c, n: c.get("/pet/paged", query_string={"page_size": 100}),
+        ),
+        Scenario(
+            "list_cars",
+            "CarCollection: all cars",
+            lambda c, n: c.get("/human/car"),
+        ),
+        Scenario(
+            "stream_pets",
+            "PetStreamCollection: all pets as NDJSON",
+            lambda c, n: c.get("/pet/stream"),
+        ),
+        Scenario(
+            "get_pet",
+            "PetResource: one pet",
+            lambda c, n: c.get(f"/pet/{pet_id(n)}"),
+        ),
+        Scenario(
+            "get_human_checked",
+            "ProjectedHumanResource: one human with pets, access checked",
+            lambda c, n: c.get(f"/human/projected/{human_id(n)}"),
+        ),
+        Scenario(
+            "multi_get_humans_checked",
+            "ProjectedHumanCollection: 50 humans by id, access checked",
+            lambda c, n: c.get(
+                "/human/projected",
+                query_string={"ids": ",".join(str(human_id(n)) for _ in range(50))},
+            ),
+        ),
+        Scenario(
+            "list_humans_read_checked",
+            "ReadableHumanCollection: all humans, user_can_read on each",
+            lambda c, n: c.get("/human/readable"),
+        ),
+        Scenario(
+            "patch_pet",
+            "PetResource: update one pet",
+            lambda c, n: c.patch(f"/pet/{pet_id(n)}", json={"species": f"s{n}"}),
+        ),
+        Scenario(
+            "patch_human_checked",
+            "HumanResource: update one human, access checked",
+            lambda c, n: c.patch(f"/human/{human_id(n)}", json={"name": USER_NAME}),
+        ),
+        Scenario(
+            "delete_pet",
+            "PetResource: delete one pet",
+            lambda c, n: c.delete(f"/pet/{doomed_pet_id(n)}"),
+        ),
+        Scenario(
+            "create_pet",
+            "PetCollection: create one pet",
+            lambda c, n: c.post("/pet", json={"genus": "Felis", "species": f"c{n}"}),
+        ),
+        Scenario(
+            "bulk_create_pets",
+            "PetBulkCollection: create 100 pets",
+            lambda c, n: c.post(
+                "/pet/bulk",
+                json=[{"genus": "Felis", "species": f"b{n}"} for _ in range(100)],
+            ),
+        ),
+    ]
+
+
+def seed(app: Flask, rows: int) -> Dict[str, int]:
+    """Create tables and insert `rows` pets, with humans and cars, in bulk."""
+    rng = random.Random(0)
+    humans = max(rows // 5, 1)
+    with app.app_context():
+        db.create_all()
+        _insert(Human, ({"id": i, "name": USER_NAME} for i in range(1, humans + 1)))
+        _insert(Car, ({"id": i, "owner_id": i} for i in range(1, humans + 1)))
+        _insert(
+            Pet,
+            (
+                {
+                    "id": i,
+                    "genus": rng.choice(("Felis", "Canis", "Mus")),
+                    "species": f"species {i}",
+                    "edible": None,
+                    "human_id": rng.randint(1, humans),
+                }
+                for i in range(1, rows + 1)
+            ),
+        )
+    return dict(humans=humans, pets=rows)
+
+
+def _insert(model, values):
+    table = model.__table__
+    chunk = []
+    for row in values:
+        chunk.append(row)
+        if len(chunk) == SEED_CHUNK_SIZE:
+            db.session.execute(table.insert(), chunk)
+            chunk = []
+    if chunk:
+        db.session.execute(table.insert(), chunk)
+    db.session.commit()
+
+
+def run_scenario(client: FlaskClient, scenario: Scenario, iterations: int, warmup: int):
+    """Time `iterations` requests of `scenario` after `warmup` untimed ones."""
+    queries = []
+
+    def count_query(*args):
+        queries[-1] += 1
+
+    for n in range(warmup):
+        scenario.request(client, n)
+
+    latencies = []
+    event.listen(Engine, "before_cursor_execute", count_query)
+    try:
+        started = time.perf_counter()
+        for n in range(warmup, warmup + iterations):
+            queries.append(0)
+            start = time.perf_counter()
+            res = scenario.request(client, n)
+            # streamed responses do their work while being read
+            res.get_data()
+            latencies.append(time.perf_counter() - start)
+            if res.status_code >= 400:
+                raise Exception(
+                    f"{scenario.name}: {res.status_code} {res.get_data(as_text=True)}"
+                )
+        elapsed = time.perf_counter() - started
+    finally:
+        event.remove(Engine, "before_cursor_execute", count_query)
+
+    return _summarize(scenario.description, latencies, elapsed, queries)
+
+
+def run_dump_scenarios(app: Flask, iterations: int, warmup: int) -> Dict[str, dict]:
+    """Time serializing `DUMP_ROWS` pets with their humans, without HTTP or queries."""
+    schema = PetSchema(many=True)
+    dumper = compile_dumper(schema)
+    scenarios = {
+        "dump_pets_marshmallow": (
+            f"PetSchema(many=True).dump() of {DUMP_ROWS} pets, jsonify",
+            lambda pets: jsonify(schema.dump(pets)),
+        ),
+        "dump_pets_compiled": (
+            f"compiled PetSchema(many=True) of {DUMP_ROWS} pets, orjson",
+            lambda pets: json_response(dumper(pets)),
+        ),
+    }
+
+    results = {}
+    with app.test_request_context():
+        pets = Pet.query.options(joinedload(Pet.human)).limit(DUMP_ROWS).all()
+        for name, (description, dump) in scenarios.items():
+            for n in range(warmup):
+                dump(pets)
+            latencies = []
+            started = time.perf_counter()
+            for n in range(iterations):
+                start = time.perf_counter()
+                dump(pets)
+                latencies.append(time.perf_counter() - start)
+            elapsed = time.perf_counter() - started
+            results[name] = _summarize(
+                description, latencies, elapsed, [0] * iterations
+            )
+    return results
+
+
+def _summarize(
+    description: str, latencies: List[float], elapsed: float, queries: List[int]
+) -> dict:
+    iterations = len(latencies)
+    latencies.sort()
+    return dict(
+        description=description,
+        iterations=iterations,
+        mean_ms=statistics.mean(latencies) * 1000,
+        p50_ms=_percentile(latencies, 50) * 1000,
+        p95_ms=_percentile(latencies, 95) * 1000,
+        p99_ms=_percentile(latencies, 99) * 1000,
+        throughput_rps=iterations / elapsed,
+        queries_per_request=statistics.mean(queries),
+    )
+
+
+def _percentile(ordered: List[float], percent: float) -> float:
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(rows: int, iterations: int, warmup: int, only: List[str] = None) -> dict:
+    """Seed a fresh database and run the benchmark scenarios."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "benchmark.sqlite")
+        app = create_app(dict(SQLALCHEMY_DATABASE_URI=f"sqlite:///{path}"))
+        counts = seed(app, rows)
+
+        with app.app_context():
+            token = create_access_token(identity={"id": 1})
+        client = app.test_client()
+        client.environ_base["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+
+        results = {}
+        for scenario in build_scenarios(**counts):
+            if only and scenario.name not in only:
+                continue
+            results[scenario.name] = run_scenario(client, scenario, iterations, warmup)
+            print(_format_result(scenario.name, results[scenario.name]), flush=True)
+
+        if not only or any(name.startswith("dump_") for name in only):
+            for name, result in run_dump_scenarios(app, iterations, warmup).items():
+                if only and name not in only:
+                    continue
+                results[name] = result
+                print(_format_result(name, result), flush=True)
+
+        with app.app_context():
+            db.get_engine(app).dispose()
+
+    return dict(
+        meta=dict(
+            rows=rows,
+            iterations=iterations,
+            warmup=warmup,
+            python=platform.python_version(),
+            sqlalchemy=sqlalchemy.__version__,
+            timestamp=time.strftime("%Y-%m-%dT%H:%M:%S"),
+        ),
+        scenarios=results,
+    )
+
+
+def _format_result(name: str, result: dict) -> str:
+    return (
+        f"{name:28} p50 {result['p50_ms']:9.2f}ms  p95 {result['p95_ms']:9.2f}ms  "
+        f"{result['throughput_rps']:9.1f} req/s  {result['queries_per_request']:6.1f} queries"
+    )
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> bool:
+    """Print changes against `baseline`.
+
+    :returns: False if a scenario's p50 latency or queries per request grew by more
+        than `threshold` (a fraction).
+    """
+    ok = True
+    print(f"\n{'scenario':28} {'p50':>10} {'p95':>10} {'req/s':>10} {'queries':>10}")
+    for name, result in results["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            print(f"{name:28} (not in baseline)")
+            continue
+        changes = {
+            key: _change(before[key], result[key])
+            for key in ("p50_ms", "p95_ms", "throughput_rps", "queries_per_request")
+        }
+        regressed = (
+            changes["p50_ms"] > threshold or changes["queries_per_request"] > threshold
+        )
+        ok = ok and not regressed
+        print(
+            f"{name:28} "
+            + " ".join(f"{change:+10.1%}" for change in changes.values())
+            + ("  REGRESSED" if regressed else "")
+        )
+    if baseline["meta"].get("rows") != results["meta"]["rows"]:
+        print("warning: baseline was run with a different number of rows")
+    return ok
+
+
+def _change(before: float, after: float) -> float:
+    if not before:
+        return 0.0 if not after else float("inf")
+    return (after - before) / before
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000, help="pets to seed")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument(
+        "--scenario", action="append", help="only run these scenarios (repeatable)"
+    )
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="allowed slowdown when comparing, as a fraction (default 0.1)",
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args.rows, args.iterations, args.warmup, args.scenario)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,5 @@
 from smorest_crud.test.app import create_app, db as db_
-from smorest_crud.test.app.model import Pet, Human, Car
+from smorest_crud.test.app.model import Pet, Human, Car, Toy
 import pytest
 from pytest_factoryboy import register
 import factory
@@ -72,3 +72,13 @@ class CarFactory(factory.Factory):
         model = Car
 
     owner = factory.SubFactory(HumanFactory)
+
+
+@register
+class ToyFactory(factory.Factory):
+    class Meta:
+        model = Toy
+
+    name = factory.LazyAttribute(lambda x: faker.name())
+
+    owner = factory.SubFactory(HumanFactory)
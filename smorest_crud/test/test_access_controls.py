@@ -2,9 +2,14 @@ from unittest.mock import patch
 
 import pytest
 from flask.testing import FlaskClient
+from sqlalchemy.dialects.postgresql.base import PGCompiler
+from sqlalchemy.dialects.sqlite.base import SQLiteCompiler
+from werkzeug.exceptions import HTTPException
 
 from smorest_crud import get_for_current_user_or_404, query_for_current_user
-from smorest_crud.test.app import Car
+from smorest_crud.access_control.utils import _cached_check
+from smorest_crud.test.app import Car, Toy, Human, USER_NAME, create_app, db as db_
+from smorest_crud.testing import assert_max_queries
 
 
 def test_create(client: FlaskClient, client_unauthenticated: FlaskClient):
@@ -182,3 +187,267 @@ def test_query_for_current_user(car_factory, db, human_factory):
         get_current_user_mock.return_value = fake_human
         car = query_for_current_user(Car).all()
         assert len(car) == 0
+
+
+def test_current_user_helpers_access_rule(toy_factory, db):
+    # Toy only declares an access rule, its query class has no query_for_user()
+    toy_1, toy_2 = toy_factory.create_batch(2)
+    db.session.add_all([toy_1, toy_2])
+    db.session.commit()
+
+    with patch(
+        "smorest_crud.access_control.utils._get_current_user"
+    ) as get_current_user_mock:
+        get_current_user_mock.return_value = toy_1.owner
+        assert query_for_current_user(Toy).all() == [toy_1]
+        assert get_for_current_user_or_404(Toy, toy_1.id) == toy_1
+        with pytest.raises(HTTPException) as e:
+            get_for_current_user_or_404(Toy, toy_2.id)
+        assert e.value.code == 404
+
+
+def test_filtered_lookup(client: FlaskClient, car_factory, db, app):
+    car_1, car_2 = car_factory.create_batch(2)
+    db.session.add_all([car_1, car_2])
+    db.session.commit()
+
+    owner = car_1.owner
+    app.config["CRUD_GET_USER"] = lambda: owner
+
+    res = client.get(f"/human/car/{car_1.id}")
+    assert res.status_code == 200
+    assert res.json["id"] == car_1.id
+
+    # not visible to this user, rejected by the query
+    assert client.get(f"/human/car/{car_2.id}").status_code == 404
+    assert client.get(f"/human/car/{car_2.id + 10}").status_code == 404
+
+
+def test_access_rule(client: FlaskClient, toy_factory, db, app):
+    toy_1, toy_2 = toy_factory.create_batch(2)
+    db.session.add_all([toy_1, toy_2])
+    db.session.commit()
+    owner = toy_1.owner
+
+    # python check on a loaded instance
+    assert toy_1.user_can_write(owner)
+    assert not toy_2.user_can_write(owner)
+    assert toy_1.user_can_read(owner)
+
+    # SQL filter
+    assert Toy.query_for_user(owner).all() == [toy_1]
+
+    app.config["CRUD_GET_USER"] = lambda: owner
+    res = client.get("/human/toy")
+    assert [toy["id"] for toy in res.json] == [toy_1.id]
+
+    assert client.get(f"/human/toy/{toy_1.id}").status_code == 200
+    assert client.get(f"/human/toy/{toy_2.id}").status_code == 404
+
+    res = client.patch(f"/human/toy/{toy_1.id}", json={"name": "Rex"})
+    assert res.json["name"] == "Rex"
+    assert (
+        client.patch(f"/human/toy/{toy_2.id}", json={"name": "Rex"}).status_code == 404
+    )
+
+
+def test_check_many(client: FlaskClient, toy_factory, human_factory, db):
+    toy_1, toy_2 = toy_factory.create_batch(2)
+    db.session.add_all([toy_1, toy_2])
+    db.session.commit()
+    owner = toy_1.owner
+
+    # access rule: answered by the database
+    assert Toy.user_can_read_many(owner, [toy_1, toy_2]) == [True, False]
+    assert Toy.user_can_write_many(toy_2.owner, [toy_1, toy_2]) == [False, True]
+
+    # plain methods: checked one by one
+    humans = [human_factory(name=USER_NAME), human_factory(name="fred")]
+    db.session.add_all(humans)
+    db.session.commit()
+    assert Human.user_can_write_many(humans[0], humans) == [True, False]
+
+    res = client.get("/human/readable")
+    assert res.status_code == 200
+    assert [human["name"] for human in res.json] == [USER_NAME]
+
+
+def test_request_cache(client: FlaskClient, toy_factory, db, app):
+    toy = toy_factory()
+    db.session.add(toy)
+    db.session.commit()
+    owner = toy.owner
+
+    calls = []
+
+    def get_user():
+        calls.append(1)
+        return owner
+
+    app.config["CRUD_GET_USER"] = get_user
+
+    # lookup through query_for_user() and write check share one user lookup
+    assert client.patch(f"/human/toy/{toy.id}", json={"name": "Rex"}).status_code == 200
+    assert len(calls) == 1
+
+    # resolved again on the next request
+    assert client.get(f"/human/toy/{toy.id}").status_code == 200
+    assert len(calls) == 2
+
+
+def test_cached_check(app, toy_factory, db):
+    toy = toy_factory()
+    db.session.add(toy)
+    db.session.commit()
+
+    checks = []
+
+    def check():
+        checks.append(1)
+        return True
+
+    with app.test_request_context():
+        assert _cached_check(toy.owner, "write", toy, check)
+        assert _cached_check(toy.owner, "write", toy, check)
+        assert len(checks) == 1
+
+        # modified objects are checked again
+        toy.name = "Rex"
+        assert _cached_check(toy.owner, "write", toy, check)
+        assert len(checks) == 2
+
+        # commits invalidate decisions
+        db.session.commit()
+        assert _cached_check(toy.owner, "write", toy, check)
+        assert len(checks) == 3
+
+
+def test_commit_outside_app_context():
+    # access decisions are forgotten after each commit, even outside of requests
+    with create_app().app_context():
+        session = db_.session()
+    session.commit()
+
+
+def test_custom_check(app, toy_factory, db, monkeypatch):
+    toy_1, toy_2 = toy_factory.create_batch(2)
+    db.session.add_all([toy_1, toy_2])
+    db.session.commit()
+    owner = toy_1.owner
+    app.config["CRUD_GET_USER"] = lambda: owner
+    monkeypatch.setattr(
+        Toy, "user_can_adopt", lambda toy, user: toy.owner is user, raising=False
+    )
+
+    view = app.view_functions["humans.ToyResource"].view_class()
+    with app.test_request_context():
+        view._check_can("adopt", toy_1)
+        assert view._check_results("adopt", [toy_1, toy_2]) == [True, False]
+        with pytest.raises(HTTPException) as e:
+            view._check_can("adopt", toy_2)
+        assert e.value.code == 403
+        with pytest.raises(NotImplementedError):
+            view._check_can("sell", toy_1)
+
+
+def test_fast_update(client: FlaskClient, toy_factory, db, app, monkeypatch):
+    toy_1, toy_2 = toy_factory.create_batch(2)
+    db.session.add_all([toy_1, toy_2])
+    db.session.commit()
+    owner = toy_1.owner
+    app.config["CRUD_GET_USER"] = lambda: owner
+
+    # not loaded before the UPDATE (SQLite has no RETURNING, so it is read back)
+    with assert_max_queries(3) as statements:
+        res = client.patch(f"/human/toy/{toy_1.id}", json={"name": "Rex"})
+    assert res.status_code == 200
+    assert res.json["name"] == "Rex"
+    assert statements[0].startswith("UPDATE")
+
+    # filtered by the write rule, and not visible either
+    assert (
+        client.patch(f"/human/toy/{toy_2.id}", json={"name": "Rex"}).status_code == 404
+    )
+    db.session.refresh(toy_2)
+    assert toy_2.name != "Rex"
+
+    # visible but not writable
+    view = app.view_functions["humans.ToyResource"].view_class
+    monkeypatch.setattr(view, "filtered_lookup_enabled", False)
+    res = client.patch(f"/human/toy/{toy_2.id}", json={"name": "Rex"})
+    assert res.status_code == 403
+
+
+def test_bulk_update_delete(client: FlaskClient, toy_factory, human_factory, db, app):
+    # only collections with the mixin route bulk methods
+    assert app.view_functions["pets.PetCollection"].view_class.methods == {
+        "GET",
+        "POST",
+    }
+    assert {"PATCH", "DELETE"} <= app.view_functions[
+        "humans.ToyCollection"
+    ].view_class.methods
+
+    owner = human_factory()
+    mine = toy_factory.create_batch(3, owner=owner, name="mine")
+    others = toy_factory.create_batch(2)
+    db.session.add_all(mine + others)
+    db.session.commit()
+    mine_ids = [toy.id for toy in mine]
+    app.config["CRUD_GET_USER"] = lambda: owner
+
+    # by keys, others' toys are skipped
+    payload = {"keys": mine_ids[:2] + [others[0].id], "values": {"name": "Rex"}}
+    res = client.patch("/human/toy", json=payload)
+    assert res.status_code == 200
+    assert res.json == {"affected": mine_ids[:2], "skipped": [others[0].id]}
+    assert Toy.query.filter_by(name="Rex").count() == 2
+
+    # by filter
+    res = client.delete("/human/toy", json={"filter": {"name": "Rex"}})
+    assert res.json == {"affected": mine_ids[:2]}
+    assert Toy.query.count() == 3
+
+    res = client.delete("/human/toy", json={"keys": [toy.id for toy in others]})
+    assert res.json["affected"] == []
+    assert Toy.query.count() == 3
+
+    assert client.delete("/human/toy", json={}).status_code == 400
+    res = client.patch("/human/toy", json={"keys": [1], "values": {}})
+    assert res.status_code == 400
+    res = client.delete("/human/toy", json={"filter": {"nope": 1}})
+    assert res.status_code == 400
+
+
+def test_fast_update_returning(client: FlaskClient, toy_factory, db, app, monkeypatch):
+    toy = toy_factory()
+    db.session.add(toy)
+    db.session.commit()
+    toy_id, owner = toy.id, toy.owner
+    app.config["CRUD_GET_USER"] = lambda: owner
+
+    # SQLite can do RETURNING, SQLAlchemy 1.3 just doesn't know
+    monkeypatch.setattr(db.engine.dialect, "update_returning", True, raising=False)
+    monkeypatch.setattr(
+        SQLiteCompiler, "returning_clause", PGCompiler.returning_clause, raising=False
+    )
+    view = app.view_functions["humans.ToyResource"].view_class
+    updated = []
+    update_directly = view._update_directly
+
+    def spy(self, *args):
+        updated.append(update_directly(self, *args))
+        return updated[-1]
+
+    monkeypatch.setattr(view, "_update_directly", spy)
+
+    with assert_max_queries(1) as queries:
+        res = client.patch(f"/human/toy/{toy_id}", json={"name": "Rex"})
+    assert res.status_code == 200
+    assert res.json == {"id": toy_id, "name": "Rex"}
+    assert "RETURNING" in queries[0]
+
+    # an instance like the normal path returns, not a dict of columns
+    (item,) = updated
+    assert isinstance(item, Toy)
+    assert item.owner.id == owner.id
@@ -0,0 +1,163 @@
+from flask.testing import FlaskClient
+from sqlalchemy import Column, Integer, Text
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import make_transient_to_detached
+
+from smorest_crud.cache import FakeCache, LRUCache, cache_key, item_cache_key
+from smorest_crud.test.app import (
+    USER_NAME,
+    HumanResource,
+    ProjectedHumanResource,
+    ToyCollection,
+    ToyResource,
+)
+from smorest_crud.test.app.model import Human, Toy
+from smorest_crud.testing import assert_max_queries
+
+
+def test_lru_cache(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("smorest_crud.cache.time.monotonic", lambda: now[0])
+
+    cache = LRUCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts least recently used "b"
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+    now[0] += 11
+    assert cache.get("a") is None
+    assert cache.stats() == dict(hits=1, misses=2)
+
+
+def test_cache_key_inheritance():
+    Base = declarative_base()
+
+    class Animal(Base):
+        __tablename__ = "animal"
+        id = Column(Integer, primary_key=True)
+        kind = Column(Text)
+        __mapper_args__ = {"polymorphic_on": kind, "polymorphic_identity": "animal"}
+
+    class Dog(Animal):
+        __mapper_args__ = {"polymorphic_identity": "dog"}
+
+    # looked up through the base class, invalidated by the loaded subclass
+    dog = Dog(id=1)
+    make_transient_to_detached(dog)
+    assert cache_key(Dog, 1) == cache_key(Animal, 1) == item_cache_key(dog)
+
+
+def test_cached_lookup(client: FlaskClient, app, pets, db, monkeypatch):
+    human = pets[0].human
+    human.name = USER_NAME  # for access check
+    db.session.commit()
+    human_id = human.id
+    key = cache_key(Human, human_id)
+
+    cache = app.extensions["crud"].cache = FakeCache()
+    monkeypatch.setattr(ProjectedHumanResource, "cache_enabled", True)
+    assert client.get(f"/human/projected/{human_id}").status_code == 200
+    assert key in cache.entries
+
+    # only the pets are loaded, not the human
+    with assert_max_queries(1) as queries:
+        res = client.get(f"/human/projected/{human_id}")
+    assert res.status_code == 200
+    assert not [q for q in queries if "FROM human" in q]
+    assert cache.stats() == dict(hits=1, misses=1)
+
+    # writes invalidate
+    res = client.patch(f"/human/projected/{human_id}", json={"name": USER_NAME + "!"})
+    assert res.status_code == 200
+    assert key in cache.deleted
+    assert key not in cache.entries
+
+    # and so do commits elsewhere
+    client.get(f"/human/projected/{human_id}")
+    Human.query.get(human_id).name = USER_NAME
+    db.session.commit()
+    assert key not in cache.entries
+    assert client.get(f"/human/projected/{human_id}").json["name"] == USER_NAME
+
+    # sparse fieldsets bypass the cache
+    cache.clear()
+    client.get(f"/human/projected/{human_id}?fields=name")
+    assert not cache.entries
+
+
+def test_cached_lookup_by_identity(client: FlaskClient, app, pets, db, monkeypatch):
+    # entries are keyed by primary key even if items are addressed by another column
+    app.extensions["crud"].key_attr = "name"
+    human = pets[0].human
+    human.name = USER_NAME
+    db.session.commit()
+    human_id = human.id
+    key = cache_key(Human, human_id)
+
+    cache = app.extensions["crud"].cache = FakeCache()
+    monkeypatch.setattr(HumanResource, "cache_enabled", True)
+    client.get(f"/human/{human_id}")
+    assert key in cache.entries
+
+    Human.query.get(human_id).not_allowed = "x"
+    db.session.commit()
+    assert key not in cache.entries
+
+    client.get(f"/human/{human_id}")
+    res = client.patch(f"/human/{human_id}", json={"name": USER_NAME})
+    assert res.status_code == 200
+    assert key in cache.deleted
+    assert key not in cache.entries
+
+
+def test_cached_lookup_after_commit(
+    client: FlaskClient, app, toy_factory, db, monkeypatch
+):
+    toy = toy_factory()
+    db.session.add(toy)
+    db.session.commit()
+    toy_id, owner_id = toy.id, toy.owner_id
+    app.config["CRUD_GET_USER"] = lambda: Human(id=owner_id)
+
+    app.extensions["crud"].cache = FakeCache()
+    monkeypatch.setattr(ToyResource, "cache_enabled", True)
+    assert client.get(f"/human/toy/{toy_id}").status_code == 200
+
+    # the cached copy is detached, expiring the session's instances doesn't reload it
+    db.session.commit()
+    with assert_max_queries(0):
+        res = client.get(f"/human/toy/{toy_id}")
+    assert res.json == {"id": toy_id, "name": toy.name}
+
+
+def test_bulk_invalidation_per_chunk(
+    client: FlaskClient, app, toy_factory, db, monkeypatch
+):
+    toys = toy_factory.create_batch(3)
+    for toy in toys[1:]:
+        toy.owner = toys[0].owner
+    db.session.add_all(toys)
+    db.session.commit()
+    ids, owner = [toy.id for toy in toys], toys[0].owner
+    app.config["CRUD_GET_USER"] = lambda: owner
+
+    cache = app.extensions["crud"].cache = FakeCache()
+    deleted_at_commit = []
+    commit = db.session.commit
+
+    def spy():
+        deleted_at_commit.append(list(cache.deleted))
+        commit()
+
+    monkeypatch.setattr(ToyCollection, "bulk_commit_per_chunk", True)
+    monkeypatch.setattr(db.session, "commit", spy)
+    res = client.patch("/human/toy", json={"keys": ids, "values": {"name": "Rex"}})
+    assert res.status_code == 200
+
+    # each chunk of 2 is invalidated once it is committed
+    keys = [cache_key(Toy, pk) for pk in ids]
+    assert deleted_at_commit[:3] == [[], keys[:2], keys]
+    assert cache.deleted == keys
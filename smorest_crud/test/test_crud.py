@@ -1,5 +1,39 @@
+import csv
+import io
+import json
+import warnings
+
+import pytest
 from flask.testing import FlaskClient
-from smorest_crud.test.app import USER_NAME
+from flask_jwt_extended import create_access_token
+from flask_smorest import Blueprint
+from marshmallow import Schema, fields as f
+from smorest_crud import CollectionView, ResourceView
+from smorest_crud.dispatch import ViewConfigError
+from smorest_crud.instrumentation import TIMINGS
+from smorest_crud.lazy_loads import LazyLoadError, LazyLoadWarning
+from smorest_crud.pagination import encode_cursor, decode_cursor
+from smorest_crud.plans import plan_cache
+from smorest_crud.serialization import compile_dumper
+from smorest_crud.loading import (
+    resolve_strategy,
+    split_prefetch_entry,
+    schema_prefetch_paths,
+    schema_column_plan,
+)
+from smorest_crud.test.app import (
+    USER_NAME,
+    HumanResource,
+    create_app,
+    db as db_,
+    PetCollection,
+    HumanSchema,
+    PetSchema,
+    PetSchemaLite,
+    is_rel_loaded,
+)
+from smorest_crud.test.app.model import Pet, Human, Toy, Tombstone, CarQuery
+from smorest_crud.testing import assert_max_queries
 
 
 def test_list(client: FlaskClient, pets):
@@ -64,3 +98,669 @@ def test_disallowed(client: FlaskClient, pets):
     assert client.post("/pointless").status_code == 405
     assert client.patch("/pointless/2").status_code == 405
     assert client.get("/pointless/1").status_code == 405
+
+
+def test_keyset_pagination(client: FlaskClient, pets):
+    seen = []
+    cursor = None
+    while True:
+        res = client.get(
+            "/pet/paged", query_string={"cursor": cursor} if cursor else {}
+        )
+        assert res.status_code == 200
+        assert len(res.json) <= 4
+        seen.extend(pet["id"] for pet in res.json)
+
+        cursor = json.loads(res.headers["X-Pagination"])["next_cursor"]
+        if not cursor:
+            break
+
+    assert seen == sorted(pet.id for pet in pets)
+
+    res = client.get("/pet/paged", query_string={"page_size": 20})
+    assert len(res.json) == 10
+    assert res.json[0]["human"]["name"]
+
+    assert client.get("/pet/paged?cursor=garbage").status_code == 400
+    # well-formed cursors with keys of the wrong type
+    for last_key in ({"id": 1}, [1], "one"):
+        cursor = encode_cursor([last_key])
+        res = client.get("/pet/paged", query_string={"cursor": cursor})
+        assert res.status_code == 400
+    assert client.get("/pet/paged?page_size=0").status_code == 400
+
+
+def test_stream(client: FlaskClient, pets, app, monkeypatch):
+    res = client.get("/pet/stream")
+    assert res.status_code == 200
+    assert res.mimetype == "application/x-ndjson"
+    rows = [json.loads(line) for line in res.data.decode().splitlines()]
+    assert [row["id"] for row in rows] == [pet.id for pet in pets]
+    assert rows[0]["human"]["name"]
+
+    view = app.view_functions["pets.PetStreamCollection"].view_class
+    monkeypatch.setattr(view, "stream_format", "json")
+    res = client.get("/pet/stream")
+    assert res.mimetype == "application/json"
+    assert len(json.loads(res.data)) == len(pets)
+
+
+def test_prefetch_strategies(app, pets, db):
+    assert resolve_strategy("auto", Pet.human) == "joined"
+    assert resolve_strategy("auto", Human.cars) == "selectin"
+    assert resolve_strategy("subquery", Human.cars) == "subquery"
+
+    assert split_prefetch_entry(Pet.human) == ([Pet.human], None)
+    assert split_prefetch_entry((Pet.human, Human.cars, "raise")) == (
+        [Pet.human, Human.cars],
+        "raise",
+    )
+    with pytest.raises(ValueError):
+        split_prefetch_entry((Pet.human, "sideways"))
+
+    class View(PetCollection):
+        prefetch = [(Pet.human, Human.cars), (Pet.human, Human.pets, "subquery")]
+        prefetch_strategy = "auto"
+
+    db.session.expunge_all()
+    first = View()._add_prefetch(Pet.query).first()
+    assert is_rel_loaded(first, "human")
+    assert is_rel_loaded(first.human, "cars")
+    assert is_rel_loaded(first.human, "pets")
+
+
+def test_prefetch_from_schema(client: FlaskClient, pets, db):
+    paths = schema_prefetch_paths(Human, HumanSchema())
+    assert [[rel.key for rel in path] for path in paths] == [["pets"]]
+    paths = schema_prefetch_paths(Pet, PetSchema())
+    assert [[rel.key for rel in path] for path in paths] == [["human"]]
+
+    human = pets[0].human
+    human.name = USER_NAME
+    db.session.commit()
+    human_id = human.id
+
+    # humans and their pets, regardless of the number of humans
+    db.session.expunge_all()
+    with assert_max_queries(2):
+        assert client.get("/human/projected").status_code == 200
+
+    db.session.expunge_all()
+    with assert_max_queries(1):
+        assert client.get(f"/human/projected/{human_id}").json["pets"]
+
+
+def test_column_projection(client: FlaskClient, pets, db):
+    plan = schema_column_plan(Human, HumanSchema())
+    assert plan == {
+        (): {"id", "name"},
+        ("pets",): {"id", "genus", "species", "human_id"},
+    }
+    pets[0].human.name = USER_NAME  # for access check
+    db.session.commit()
+    human_id = pets[0].human.id
+
+    db.session.expunge_all()
+    with assert_max_queries(2) as queries:
+        res = client.get("/human/projected")
+    assert res.status_code == 200
+    assert res.json[0]["pets"][0]["genus"]
+    assert "not_allowed" not in queries[0]
+    assert "edible" not in queries[1]
+
+    # sparse fieldset narrows the columns and the response
+    db.session.expunge_all()
+    with assert_max_queries(2) as queries:
+        res = client.get("/human/projected?fields=id,pets.species")
+    assert res.status_code == 200
+    assert set(res.json[0]) == {"id", "pets"}
+    assert set(res.json[0]["pets"][0]) == {"species"}
+    assert "human.name" not in queries[0]
+    assert "pet.genus" not in queries[1]
+
+    res = client.get(f"/human/projected/{human_id}?fields=name")
+    assert res.json == {"name": USER_NAME}
+
+    assert client.get("/human/projected?fields=id,nope").status_code == 400
+    assert client.get("/human/projected?fields=not_allowed").status_code == 400
+
+
+def test_bulk_create(client: FlaskClient, db):
+    payload = [{"species": f"Felis {n}", "genus": "Felis"} for n in range(5)]
+    with assert_max_queries(3) as queries:
+        res = client.post("/pet/bulk", json=payload)
+    assert res.status_code == 200
+    assert res.json == {"created": 5}
+    # one executemany per chunk of 2
+    assert len([q for q in queries if q.startswith("INSERT")]) == 3
+    assert Pet.query.filter_by(genus="Felis").count() == 5
+
+    # keys only
+    res = client.post("/human/bulk", json=[{"name": USER_NAME}, {"name": USER_NAME}])
+    assert res.status_code == 200
+    assert len(res.json) == 2
+    assert all(set(human) == {"id"} and human["id"] for human in res.json)
+
+    # all or nothing when an item fails the access check
+    count = Human.query.count()
+    res = client.post("/human/bulk", json=[{"name": USER_NAME}, {"name": "fred"}])
+    assert res.status_code == 403
+    assert Human.query.count() == count
+
+
+def test_multi_get(client: FlaskClient, pets, db):
+    ids = [pets[3].human_id, pets[0].human_id, 9999, pets[5].human_id]
+
+    db.session.expunge_all()
+    # humans, then their pets
+    with assert_max_queries(2):
+        res = client.get(
+            "/human/projected", query_string={"ids": ",".join(map(str, ids))}
+        )
+    assert res.status_code == 200
+    assert [human["id"] for human in res.json] == [ids[0], ids[1], ids[3]]
+    assert res.json[0]["pets"]
+    assert json.loads(res.headers["X-Missing-Keys"]) == [9999]
+
+    res = client.get("/human/projected?ids=1&ids=2&fields=name")
+    assert [set(human) for human in res.json] == [{"name"}, {"name"}]
+
+    assert client.get("/human/projected?ids=x").status_code == 400
+
+
+def test_etags(client: FlaskClient, toy_factory, pets, db, app, monkeypatch):
+    toy = toy_factory()
+    db.session.add(toy)
+    db.session.commit()
+    toy_id = toy.id
+    owner = toy.owner
+    app.config["CRUD_GET_USER"] = lambda: owner
+
+    resource = app.view_functions["humans.ToyResource"].view_class
+    collection = app.view_functions["humans.ToyCollection"].view_class
+    for view in (resource, collection):
+        monkeypatch.setattr(view, "etag_enabled", True)
+        monkeypatch.setattr(view, "version_column", "version")
+    res = client.get(f"/human/toy/{toy_id}")
+    etag = res.headers["ETag"].strip('"')
+    list_etag = client.get("/human/toy").headers["ETag"].strip('"')
+
+    # only the version is queried
+    with assert_max_queries(1) as queries:
+        res = client.get(f"/human/toy/{toy_id}", headers={"If-None-Match": etag})
+    assert res.status_code == 304
+    assert not res.data
+    assert "toy.name" not in queries[0]
+    res = client.get("/human/toy", headers={"If-None-Match": list_etag})
+    assert res.status_code == 304
+
+    # stale If-Match
+    res = client.patch(
+        f"/human/toy/{toy_id}", json={"name": "Rex"}, headers={"If-Match": "nope"}
+    )
+    assert res.status_code == 412
+    res = client.patch(
+        f"/human/toy/{toy_id}", json={"name": "Rex"}, headers={"If-Match": etag}
+    )
+    assert res.status_code == 200
+
+    # the update bumped the version
+    res = client.get(f"/human/toy/{toy_id}", headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.json["name"] == "Rex"
+    res = client.get("/human/toy", headers={"If-None-Match": list_etag})
+    assert res.status_code == 200
+
+    # hash of the serialized body
+    human = pets[0].human
+    human.name = owner.name
+    db.session.commit()
+    human_id = human.id
+    resource = app.view_functions["humans.ProjectedHumanResource"].view_class
+    monkeypatch.setattr(resource, "etag_enabled", True)
+    res = client.get(f"/human/projected/{human_id}")
+    etag = res.headers["ETag"].strip('"')
+    assert res.json["name"] == owner.name
+    res = client.get(f"/human/projected/{human_id}", headers={"If-None-Match": etag})
+    assert res.status_code == 304
+    res = client.get(f"/human/projected/{human_id}?fields=name")
+    assert res.json == {"name": owner.name}
+    assert res.headers["ETag"].strip('"') != etag
+
+    res = client.patch(
+        f"/human/projected/{human_id}",
+        json={"name": owner.name},
+        headers={"If-Match": "x"},
+    )
+    assert res.status_code == 412
+
+
+def test_etags_concurrent_writes(
+    client: FlaskClient, toy_factory, db, app, monkeypatch
+):
+    first, second = toy_factory(), toy_factory()
+    second.owner = first.owner
+    first.version = 5
+    db.session.add_all([first, second])
+    db.session.commit()
+    toy_id = second.id
+    owner = first.owner
+    app.config["CRUD_GET_USER"] = lambda: owner
+
+    resource = app.view_functions["humans.ToyResource"].view_class
+    collection = app.view_functions["humans.ToyCollection"].view_class
+    for view in (resource, collection):
+        monkeypatch.setattr(view, "etag_enabled", True)
+        monkeypatch.setattr(view, "version_column", "version")
+    # versions count per row, updating a toy below the latest version still counts
+    list_etag = client.get("/human/toy").headers["ETag"].strip('"')
+    res = client.patch(f"/human/toy/{toy_id}", json={"name": "Rex"})
+    assert res.status_code == 200
+    res = client.get("/human/toy", headers={"If-None-Match": list_etag})
+    assert res.status_code == 200
+
+    # a write between the If-Match check and the update isn't overwritten
+    etag = client.get(f"/human/toy/{toy_id}").headers["ETag"].strip('"')
+    check_if_match = resource._check_if_match
+
+    def concurrent_write(self, *args):
+        version = check_if_match(self, *args)
+        db.session.execute(
+            Toy.__table__.update()
+            .where(Toy.id == toy_id)
+            .values(name="Fido", version=Toy.version + 1)
+        )
+        db.session.commit()
+        return version
+
+    with monkeypatch.context() as m:
+        m.setattr(resource, "_check_if_match", concurrent_write)
+        res = client.patch(
+            f"/human/toy/{toy_id}", json={"name": "Max"}, headers={"If-Match": etag}
+        )
+    assert res.status_code == 412
+    assert Toy.query.get(toy_id).name == "Fido"
+
+    # loaded items are locked for conditional writes
+    locked = []
+    with_for_update = type(Toy.query).with_for_update
+
+    def spy(query, **kwargs):
+        locked.append(kwargs)
+        return with_for_update(query, **kwargs)
+
+    monkeypatch.setattr(type(Toy.query), "with_for_update", spy)
+    monkeypatch.setattr(resource, "fast_update_enabled", False)
+    etag = client.get(f"/human/toy/{toy_id}").headers["ETag"].strip('"')
+    assert not locked
+    res = client.patch(
+        f"/human/toy/{toy_id}", json={"name": "Max"}, headers={"If-Match": etag}
+    )
+    assert res.status_code == 200
+    assert locked == [dict(of=Toy.__table__)]
+
+
+def test_read_replicas():
+    app = create_app(
+        dict(
+            SQLALCHEMY_BINDS={"replica": "sqlite://"},
+            CRUD_REPLICA_BINDS=["replica"],
+        )
+    )
+    with app.app_context():
+        db_.create_all()
+        db_.Model.metadata.create_all(bind=db_.get_engine(app, bind="replica"))
+        db_.session.add(Human(name=USER_NAME))
+        db_.session.commit()
+        replica = app.extensions["crud"].replicas.sessions[0]
+        replica.add(Human(name="replica"))
+        replica.commit()
+
+        # API clients don't keep cookies, they are recognized by their token
+        client, other = app.test_client(use_cookies=False), app.test_client()
+        for user_id, c in ((1, client), (2, other)):
+            token = create_access_token(identity={"id": user_id})
+            c.environ_base["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+
+        assert [human["name"] for human in client.get("/human").json] == ["replica"]
+
+        # writes go to the primary, and the writer's reads follow for a while
+        assert client.post("/human", json={"name": USER_NAME}).status_code == 200
+        assert len(client.get("/human").json) == 2
+        assert [human["name"] for human in other.get("/human").json] == ["replica"]
+        app.extensions["crud"].replicas.sticky_store.clear()
+        assert [human["name"] for human in client.get("/human").json] == ["replica"]
+
+
+def test_instrumentation():
+    reported = []
+    app = create_app(
+        dict(
+            CRUD_INSTRUMENTATION_ENABLED=True,
+            CRUD_METRICS_CALLBACK=lambda endpoint, metrics: reported.append(
+                (endpoint, metrics)
+            ),
+        )
+    )
+    with app.app_context():
+        db_.create_all()
+        for n in range(3):
+            db_.session.add(Human(name=USER_NAME, pets=[Pet(genus="Felis")]))
+        db_.session.commit()
+
+        client = app.test_client()
+        token = create_access_token(identity={"id": 1})
+        client.environ_base["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+
+        res = client.get("/human/readable")
+        assert res.status_code == 200
+        header = res.headers["Server-Timing"]
+        names = [entry.split(";")[0] for entry in header.split(", ")]
+        assert names == list(TIMINGS) + ["rows"]
+        assert "sql;dur=" in header and 'desc="4 queries"' in header
+        assert 'rows;desc="6"' in header
+
+        endpoint, metrics = reported[-1]
+        assert endpoint == "humans.ReadableHumanCollection"
+        # humans, then each human's pets lazy loaded when dumping
+        assert metrics["queries"] == 4
+        assert metrics["rows"] == 6
+        assert metrics["access"] > 0
+        assert metrics["total"] >= metrics["view"]
+
+        client.get("/human/readable")
+        histograms = app.extensions["crud"].metrics.snapshot()[endpoint]
+        assert histograms["total"]["count"] == 2
+        assert sum(histograms["queries"]["buckets"].values()) == 2
+
+        # aborted requests are reported too
+        assert client.get("/human/9999").status_code == 404
+        assert reported[-1][0] == "humans.HumanResource"
+
+
+def test_lazy_load_detection():
+    app = create_app(dict(CRUD_LAZY_LOAD_DETECTION="warn"))
+    with app.app_context():
+        db_.create_all()
+        for n in range(3):
+            db_.session.add(Human(name=USER_NAME, pets=[Pet(genus="Felis")]))
+        db_.session.commit()
+        db_.session.expunge_all()
+
+        client = app.test_client()
+        token = create_access_token(identity={"id": 1})
+        client.environ_base["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+
+        with pytest.warns(LazyLoadWarning) as warned:
+            assert client.get("/human/readable").status_code == 200
+        message = str(warned[0].message)
+        assert "Human.pets: 3 times" in message
+        assert "ReadableHumanCollection.prefetch: [Human.pets]" in message
+
+        # prefetched from the schema
+        db_.session.expunge_all()
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", LazyLoadWarning)
+            with assert_max_queries(2):
+                assert client.get("/human/projected").status_code == 200
+
+        app.extensions["crud"].lazy_load_detection = "raise"
+        app.testing = True
+        db_.session.expunge_all()
+        with pytest.raises(LazyLoadError):
+            client.get("/human/readable")
+
+        with pytest.raises(AssertionError):
+            with assert_max_queries(1):
+                client.get("/human/projected")
+
+
+def test_plan_cache(client: FlaskClient, pets, db, app):
+    plan_cache.clear()
+    pet_id = pets[0].id
+
+    for n in range(3):
+        db.session.expunge_all()
+        res = client.get(f"/pet/{pet_id}")
+        assert res.status_code == 200
+        assert res.json["id"] == pet_id
+
+    # baked lookup, its loader options and the response schema built once
+    info = app.extensions["crud"].plan_cache_info()
+    assert info["misses"] == 3
+    assert info["hits"] == 2
+    assert info["size"] == 3
+
+    assert client.get("/pet/9999").status_code == 404
+
+
+def test_plan_cache_query_class(client: FlaskClient, car_factory, db, app, monkeypatch):
+    car = car_factory()
+    db.session.add(car)
+    db.session.commit()
+    car_id, owner = car.id, car.owner
+    app.config["CRUD_GET_USER"] = lambda: owner
+
+    # lookups of models with their own query class aren't baked
+    looked_up = []
+    get_or_404 = CarQuery.get_or_404
+
+    def spy(query, pk, *args, **kwargs):
+        looked_up.append(pk)
+        return get_or_404(query, pk, *args, **kwargs)
+
+    view = app.view_functions["humans.CarResource"].view_class
+    monkeypatch.setattr(view, "filtered_lookup_enabled", False)
+    monkeypatch.setattr(CarQuery, "get_or_404", spy)
+    assert client.get(f"/human/car/{car_id}").status_code == 200
+    assert looked_up == [car_id]
+
+
+def test_view_config(app):
+    crud = app.extensions["crud"]
+    crud.compile_views()
+    config = crud.view_configs[HumanResource]
+    assert config.model is Human
+    assert config.access_checks_enabled
+    assert config.checks == {"read", "write", "create"}
+    assert config.key_column is Human.id
+    assert not crud.view_configs[PetCollection].access_checks_enabled
+
+    class UncheckedResource(ResourceView):
+        model = Pet
+        get_enabled = True
+
+    with pytest.raises(ViewConfigError, match=r"Pet.user_can_read\(\)"):
+        crud.view_config(UncheckedResource)
+
+    class MisspelledCollection(CollectionView):
+        model = Human
+        prefetch = [(Human.pets, "sideways")]
+
+    with pytest.raises(ViewConfigError, match="sideways"):
+        crud.view_config(MisspelledCollection)
+
+    class UnversionedResource(ResourceView):
+        model = Human
+        version_column = "updated_at"
+
+    with pytest.raises(ViewConfigError, match="updated_at"):
+        crud.view_config(UnversionedResource)
+
+    # deletes of other users' items would leak through the change feed
+    class UnscopedFeed(CollectionView):
+        model = Toy
+        tombstone_model = Tombstone
+        change_feed_enabled = True
+        change_column = "updated_at"
+
+    with pytest.raises(ViewConfigError, match=r"tombstone_scopes\(\)"):
+        crud.view_config(UnscopedFeed)
+
+
+def test_view_config_at_startup():
+    app = create_app()
+    blp = Blueprint("unchecked", "unchecked", url_prefix="/unchecked")
+
+    @blp.route("/<int:pk>")
+    class UncheckedResource(ResourceView):
+        model = Pet
+        get_enabled = True
+
+    # raised while setting up the app, not at the first request
+    with pytest.raises(ViewConfigError, match=r"Pet.user_can_read\(\)"):
+        app.extensions["crud"].register_blueprint(blp)
+
+
+def test_fast_serialization(client: FlaskClient, pets, app, monkeypatch):
+    pets[0].edible = "yes"
+    schema = PetSchema(many=True)
+    dumper = compile_dumper(schema)
+    assert dumper(pets) == schema.dump(pets)
+    assert compile_dumper(HumanSchema())(pets[0].human) == HumanSchema().dump(
+        pets[0].human
+    )
+
+    # fall back to marshmallow
+    class ComputedSchema(Schema):
+        id = f.Integer()
+        legs = f.Method("count_legs")
+
+        def count_legs(self, pet):
+            return 4
+
+    class DeepSchema(Schema):
+        pets = f.Nested(PetSchemaLite, many=True)  # pets.human is two levels deep
+
+    assert compile_dumper(ComputedSchema()) is None
+    assert compile_dumper(DeepSchema()) is None
+
+    views = [
+        app.view_functions[f"pets.{name}"].view_class
+        for name in ("PetPagedCollection", "PetStreamCollection")
+    ]
+    expected = [client.get(url).data for url in ("/pet/paged", "/pet/stream")]
+    for view in views:
+        monkeypatch.setattr(view, "fast_serialization_enabled", True)
+    res = client.get("/pet/paged")
+    assert res.status_code == 200
+    assert json.loads(res.data) == json.loads(expected[0])
+    assert "X-Pagination" in res.headers
+
+    res = client.get("/pet/stream")
+    assert [json.loads(line) for line in res.data.splitlines()] == [
+        json.loads(line) for line in expected[1].splitlines()
+    ]
+
+
+def test_export(client: FlaskClient, pets, app, monkeypatch):
+    view = app.view_functions["pets.PetStreamCollection"].view_class
+    monkeypatch.setattr(view, "export_enabled", True)
+    res = client.get("/pet/stream?export=csv")
+    assert res.status_code == 200
+    assert res.mimetype == "text/csv"
+    assert 'filename="pet.csv"' in res.headers["Content-Disposition"]
+    header, *rows = csv.reader(io.StringIO(res.data.decode()))
+    # nested human isn't a column
+    assert sorted(header) == ["edible", "genus", "id", "species"]
+    exported = {int(row[header.index("id")]): row for row in rows}
+    assert sorted(exported) == sorted(pet.id for pet in pets)
+    assert exported[pets[0].id][header.index("genus")] == pets[0].genus
+
+    assert client.get("/pet/stream?export=xml").status_code == 400
+    assert client.get("/pet/stream").mimetype == "application/x-ndjson"
+
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+
+    monkeypatch.setattr(view, "export_batch_size", 2)
+    res = client.get("/pet/stream?export=arrow")
+    assert res.mimetype == "application/vnd.apache.arrow.stream"
+    table = pyarrow.ipc.open_stream(res.data).read_all()
+    assert table.num_rows == len(pets)
+    assert table.schema.field("id").type == pyarrow.int64()
+
+    res = client.get("/pet/stream?export=parquet")
+    table = pyarrow.parquet.read_table(io.BytesIO(res.data))
+    assert sorted(table.column("id").to_pylist()) == sorted(p.id for p in pets)
+
+
+def test_change_feed(client: FlaskClient, toy_factory, db, app):
+    toy = toy_factory()
+    owner = toy.owner
+    toys = [toy] + [toy_factory(owner=owner) for _ in range(2)]
+    toy_factory()  # someone else's
+    db.session.add_all(toys)
+    db.session.commit()
+    ids = [toy.id for toy in toys]
+    app.config["CRUD_GET_USER"] = lambda: owner
+
+    # first sync, page by page
+    res = client.get("/human/toy", query_string=dict(since="", page_size=2))
+    assert res.status_code == 200
+    assert [item["id"] for item in res.json["items"]] == ids[:2]
+    assert res.json["deleted"] == []
+    assert res.json["has_more"]
+    res = client.get(
+        "/human/toy", query_string=dict(since=res.json["next_cursor"], page_size=2)
+    )
+    assert [item["id"] for item in res.json["items"]] == ids[2:]
+    assert not res.json["has_more"]
+    cursor = res.json["next_cursor"]
+
+    res = client.get("/human/toy", query_string=dict(since=cursor))
+    assert res.json["items"] == [] and res.json["deleted"] == []
+    assert res.json["next_cursor"] == cursor
+
+    # changes and deletes since
+    assert client.patch(f"/human/toy/{ids[0]}", json={"name": "Rex"}).status_code == 200
+    assert client.delete(f"/human/toy/{ids[1]}").status_code == 200
+    res = client.delete("/human/toy", json={"keys": [ids[2]]})
+    assert res.json["affected"] == [ids[2]]
+    res = client.get("/human/toy", query_string=dict(since=cursor))
+    assert res.json["items"] == [{"id": ids[0], "name": "Rex"}]
+    assert res.json["deleted"] == ids[1:]
+
+    res = client.get("/human/toy", query_string=dict(since=res.json["next_cursor"]))
+    assert res.json["items"] == [] and res.json["deleted"] == []
+
+    assert client.get("/human/toy?since=nope").status_code == 400
+    change, key, tombstone = decode_cursor(res.json["next_cursor"])
+    for parts in (
+        [change, "x", tombstone],
+        [change, None, tombstone],
+        [{"at": change}, key, tombstone],
+        [change, key, "1"],
+        [change, key, True],
+        [change, key],
+    ):
+        res = client.get("/human/toy", query_string=dict(since=encode_cursor(parts)))
+        assert res.status_code == 400, parts
+    assert client.get("/human/toy").json == [{"id": ids[0], "name": "Rex"}]
+
+
+def test_change_feed_scopes(client: FlaskClient, toy_factory, db, app):
+    mine, theirs, their_other = toy_factory(), toy_factory(), toy_factory()
+    their_other.owner = theirs.owner
+    db.session.add_all([mine, theirs, their_other])
+    db.session.commit()
+    me, them = mine.owner, theirs.owner
+    their_ids = [theirs.id, their_other.id]
+
+    app.config["CRUD_GET_USER"] = lambda: me
+    my_cursor = client.get("/human/toy?since=").json["next_cursor"]
+
+    # they delete their toys, one by one and in bulk
+    app.config["CRUD_GET_USER"] = lambda: them
+    their_cursor = client.get("/human/toy?since=").json["next_cursor"]
+    assert client.delete(f"/human/toy/{their_ids[0]}").status_code == 200
+    res = client.delete("/human/toy", json={"keys": their_ids[1:]})
+    assert res.json["affected"] == their_ids[1:]
+    res = client.get("/human/toy", query_string=dict(since=their_cursor))
+    assert res.json["deleted"] == their_ids
+
+    # and I'm not told about it
+    app.config["CRUD_GET_USER"] = lambda: me
+    res = client.get("/human/toy", query_string=dict(since=my_cursor))
+    assert res.json["deleted"] == []
+    assert {row.scope for row in Tombstone.query} == {str(them.id)}
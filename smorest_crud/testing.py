@@ -0,0 +1,38 @@
+"""Helpers for testing apps using smorest-crud."""
+
+from contextlib import contextmanager
+from typing import List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@contextmanager
+def assert_max_queries(max_queries: int, engine=Engine):
+    """Fail if the block executes more than `max_queries` SQL statements.
+
+    Counts statements of all engines unless `engine` is given. Example::
+
+        def test_list_humans(client):
+            with assert_max_queries(2):
+                client.get("/human")
+
+    :returns: list of executed statements.
+    """
+    statements: List[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    if len(statements) > max_queries:
+        listing = "\n".join(f"  {statement}" for statement in statements)
+        raise AssertionError(
+            f"{len(statements)} queries executed, expected at most {max_queries}:\n"
+            f"{listing}"
+        )
@@ -1,12 +1,65 @@
-from typing import Iterable, Optional
+from functools import partial
+from typing import Iterable, Iterator, Optional, List
+from flask import (
+    request,
+    after_this_request,
+    json,
+    jsonify,
+    Response,
+    stream_with_context,
+)
 from flask.views import MethodView
 from flask_smorest import abort
 from flask_sqlalchemy import BaseQuery, Model, SQLAlchemy
-from sqlalchemy.orm import RelationshipProperty, joinedload
-from functools import reduce
+from sqlalchemy import inspect, func, bindparam, and_, or_
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import RelationshipProperty, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
 from flask_jwt_extended import jwt_required
-from smorest_crud import _crud, config_keys
-from smorest_crud.access_control import AccessControlUser
+from marshmallow import Schema
+from smorest_crud import _crud
+from smorest_crud.access_control import (
+    AccessControlUser,
+    access_criterion,
+)
+from smorest_crud.access_control.utils import _get_current_user, _cached_check
+from smorest_crud.pagination import encode_cursor, decode_cursor
+from smorest_crud.cache import cache_key, item_cache_key, detached_copy
+from smorest_crud.plans import plan_cache, bakery
+from smorest_crud.dispatch import CHECK_METHODS, ViewConfig
+from smorest_crud.etag import make_etag
+from smorest_crud.changes import (
+    coerce_change_value,
+    tombstone_values,
+    tombstones_since,
+)
+from smorest_crud.export import (
+    MIMETYPES,
+    WRITERS,
+    available_formats,
+    batched,
+    convert_rows,
+    export_columns,
+)
+from smorest_crud.serialization import (
+    Dumper,
+    compile_dumper,
+    encode_json,
+    json_response,
+)
+from smorest_crud.instrumentation import timed, timed_view, dispatch_instrumented
+from smorest_crud.lazy_loads import dispatch_detecting
+from smorest_crud.loading import (
+    split_prefetch_entry,
+    resolve_strategy,
+    loader_chain,
+    is_collection,
+    schema_prefetch_paths,
+    schema_column_plan,
+    relationship_columns,
+    projection_options,
+    narrow_schema,
+)
 import logging
 
 log = logging.getLogger(__name__)
@@ -33,17 +86,92 @@ class CRUDView(MethodView):
     Applies `jwt_required <https://flask-jwt-extended.readthedocs.io/en/stable/api/#flask_jwt_extended.jwt_required>`_ by default to required authenticated requests.
     """
 
+    prefetch: Iterable[RelationshipProperty] = []
+    """List of relationships to `prefetch <https://docs.sqlalchemy.org/en/13/orm/loading_relationships.html#relationship-loading-with-loader-options>`_ when loading items.
+
+    Entries are a relationship or a tuple chaining relationships, optionally ending
+    in a loader strategy name: ``(Pet.human, Human.cars, "selectin")``."""
+
+    prefetch_strategy: str = "joined"
+    """Loader strategy for `prefetch` entries that don't name one.
+
+    One of ``joined``, ``selectin``, ``subquery``, ``raise`` or ``auto``.
+    ``auto`` joins many-to-one relationships and selectin-loads collections."""
+
+    prefetch_from_schema: bool = False
+    """Also prefetch the relationships serialized by the view's response schema.
+
+    The ``Nested`` fields of the schema are walked once per view class and method,
+    and the resulting loader options are reused on every request."""
+
+    column_projection_enabled: bool = False
+    """Only load the columns the response schema dumps (``load_only``).
+
+    Applies to `model` and to relationships serialized with ``Nested`` fields.
+    Entities with fields that aren't plain columns are loaded in full."""
+
+    sparse_fields_enabled: bool = False
+    """Accept ``?fields=id,name,pets.genus`` on GET to only load and dump those fields."""
+
+    response_schema: Optional[Schema] = None
+    """Schema the view serializes items with.
+
+    Defaults to the schema passed to ``@blp.response()`` on the view method."""
+
+    fast_serialization_enabled: bool = False
+    """Dump responses with a function compiled from the response schema and encode them with orjson.
+
+    Reads plain columns and one level of ``Nested`` relationships straight from
+    loaded items. Schemas with hooks, ``Method``/``Function`` or custom fields
+    are dumped by marshmallow as usual, see :mod:`smorest_crud.serialization`."""
+
+    etag_enabled: bool = False
+    """Send ETags on GET, answer ``If-None-Match`` with 304 and check ``If-Match`` on writes.
+
+    ETags are computed from `version_column` if set, otherwise by hashing the
+    serialized response. Writes with a stale ``If-Match`` fail with 412."""
+
+    tombstone_model: Optional[Model] = None
+    """Model with :class:`smorest_crud.changes.TombstoneMixin` columns recording deleted keys.
+
+    Deletes through the view add a tombstone in the same transaction, for change
+    feeds to report."""
+
+    tombstone_scope_column: Optional[str] = None
+    """Attribute of `model` recorded as the scope of tombstones, e.g. ``owner_id``.
+
+    Change feeds only report a delete to users whose
+    :meth:`CollectionView.tombstone_scopes` include it. Needed to record
+    tombstones with access checks enabled."""
+
+    version_column: Optional[str] = None
+    """Attribute of `model` changed by every update, e.g. a version counter or ``updated_at``.
+
+    Lets ETags be checked with a query for versions instead of loading and
+    serializing items. Collection ETags sum integer versions, so per-row counters
+    work; other types have to increase with every update, like timestamps."""
+
+    def dispatch_request(self, *args, **kwargs):
+        dispatch = super().dispatch_request
+        if _crud.lazy_load_detection:
+            dispatch = partial(dispatch_detecting, self, dispatch)
+        if _crud.instrumentation_enabled:
+            return dispatch_instrumented(dispatch, *args, **kwargs)
+        return dispatch(*args, **kwargs)
+
     def query(self) -> BaseQuery:
-        """Return query for `model`."""
-        return self._get_model().query
+        """Return query for `model`, on a read replica for GET requests if configured."""
+        return self._route_query(self._get_model().query)
 
+    @timed("query_for_user")
     def query_for_user(self) -> BaseQuery:
         """Produce a query for current model, filtered by `model.query_for_user(current_user)`."""
         model_cls = self._get_model()
 
         # try to filter the query by current user
+        config = self._config
         query = model_cls.query
-        if hasattr(model_cls, "query_for_user"):
+        if config.has_query_for_user:
             # filter query by user
             user = self._get_current_user()
             query = model_cls.query_for_user(user)
@@ -52,13 +180,30 @@ class CRUDView(MethodView):
             if not query:
                 self._abort_access_check_failed(model_cls)
 
-        elif self._access_checks_enabled():
+        elif "read" in config.access_rules:
+            # filter query by the model's access rule
+            query = query.filter(self._access_criterion("read"))
+
+        elif config.access_checks_enabled:
             # can't filter by user
             raise NotImplementedError(
                 f"{model_cls} does not implement query_for_user() and access control checks are enabled"
             )
 
-        return query
+        return self._route_query(query)
+
+    def _read_session(self):
+        """Session for reads: a replica for GET requests, unless pinned to the primary."""
+        replicas = _crud.replicas
+        if replicas is None or not replicas.use_replica():
+            return self._db.session
+        return replicas.session()
+
+    def _route_query(self, query: BaseQuery) -> BaseQuery:
+        session = self._read_session()
+        if session is self._db.session:
+            return query
+        return query.with_session(session())
 
     def _get_model(self) -> Model:
         """Return model class this API is using."""
@@ -67,19 +212,226 @@ class CRUDView(MethodView):
         # otherwise... sorry
         raise Exception(f"no model class exists on {self}")
 
+    def _get_key_column(self):
+        """Return the unique column identifying items of `model`.
+
+        Uses `CRUD_DEFAULT_KEY_COLUMN` if the model has it, otherwise the primary key.
+        """
+        key = self._config.key_column
+        if key is None:
+            raise Exception(
+                f"{self._get_model()} has a composite primary key, set CRUD_DEFAULT_KEY_COLUMN"
+            )
+        return key
+
+    @property
+    def _config(self) -> ViewConfig:
+        """Configuration of this view class, resolved once per app."""
+        config = self.__dict__.get("_crud_config")
+        if config is None:
+            config = self.__dict__["_crud_config"] = _crud.view_config(type(self))
+        return config
+
+    def _get_response_schema(self, method: str = "get") -> Optional[Schema]:
+        """Return schema for serializing responses of view `method`."""
+        if self.response_schema is not None:
+            return self.response_schema
+        return plan_cache.get(
+            ("schema", type(self), method), lambda: self._find_response_schema(method)
+        )
+
+    def _find_response_schema(self, method: str) -> Optional[Schema]:
+        # look up the schema documented by flask-smorest's @blp.response()
+        apidoc = getattr(getattr(self, method, None), "_apidoc", {})
+        for response in apidoc.get("response", {}).get("responses", {}).values():
+            if isinstance(response, dict) and response.get("schema") is not None:
+                return response["schema"]
+        return None
+
+    def _get_dump_schema(self, method: str = "get") -> Optional[Schema]:
+        """Return response schema, narrowed to the requested sparse fields if any."""
+        schema = self._get_response_schema(method)
+        fields = self._get_sparse_fields()
+        if fields is None or schema is None:
+            return schema
+        try:
+            return narrow_schema(schema, fields)
+        except ValueError as e:
+            abort(400, message=str(e))
+
+    def _get_sparse_fields(self) -> Optional[List[str]]:
+        """Return ``?fields=`` requested for a GET, if enabled."""
+        if not self.sparse_fields_enabled or request.method != "GET":
+            return None
+        fields = request.args.get("fields")
+        if not fields:
+            return None
+        return [field.strip() for field in fields.split(",") if field.strip()]
+
+    @timed("dump")
+    def _dump_response(self, data, method: str = "get"):
+        """Serialize `data` ourselves if sparse fields or body ETags are needed.
+
+        Otherwise return `data` for ``@blp.response()`` to serialize."""
+        if self.etag_enabled and self.version_column is None:
+            return self._dump_with_etag(data, method)
+        dumper = self._get_dumper(method)
+        if dumper is not None:
+            return json_response(dumper(data))
+        if self._get_sparse_fields() is None:
+            return data
+        return jsonify(self._get_dump_schema(method).dump(data))
+
+    def _get_dumper(self, method: str = "get") -> Optional[Dumper]:
+        """Compiled serializer for `method` if `fast_serialization_enabled` and the schema allows."""
+        if not self.fast_serialization_enabled:
+            return None
+        if self._get_sparse_fields() is not None:
+            schema = self._get_dump_schema(method)
+            return compile_dumper(schema) if schema is not None else None
+        return plan_cache.get(
+            ("dumper", type(self), method), lambda: self._compile_dumper(method)
+        )
+
+    def _compile_dumper(self, method: str) -> Optional[Dumper]:
+        schema = self._get_response_schema(method)
+        return compile_dumper(schema) if schema is not None else None
+
+    def _dump_with_etag(self, data, method: str = "get"):
+        """Serialize `data` and tag it with a hash of the body."""
+        schema = self._get_dump_schema(method)
+        if schema is None:
+            return data
+        dumper = self._get_dumper(method)
+        body = dumper(data) if dumper is not None else schema.dump(data)
+        etag = make_etag(body)
+        if request.if_none_match.contains_weak(etag):
+            return self._not_modified(etag)
+        response = json_response(body) if dumper is not None else jsonify(body)
+        response.set_etag(etag)
+        return response
+
+    def _not_modified(self, etag: str) -> Response:
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    def _set_etag_header(self, etag: str):
+        @after_this_request
+        def add_etag_header(response):
+            response.set_etag(etag)
+            return response
+
+    def _get_version_column(self):
+        return getattr(self._get_model(), self.version_column)
+
+    def _version_etag(self, *parts) -> str:
+        """ETag for a `version_column` value, varying with sparse fieldsets."""
+        return make_etag(self._get_model().__name__, self._get_sparse_fields(), *parts)
+
+    def _add_prefetch(self, query: BaseQuery, method: str = "get") -> BaseQuery:
+        """Apply `prefetch` and column projection loader options for `method`."""
+        if self._get_sparse_fields() is not None:
+            # depends on the request, don't cache
+            opts = self._build_prefetch_options(self._get_dump_schema(method))
+        else:
+            opts = self._get_prefetch_options(method)
+        if opts:
+            query = query.options(*opts)
+        return query
+
+    def _get_prefetch_options(self, method: str) -> List:
+        """Loader options for `method`, built once per view class."""
+        return plan_cache.get(
+            ("prefetch", type(self), method),
+            lambda: self._build_prefetch_options(self._get_response_schema(method)),
+        )
+
+    def _build_prefetch_options(self, schema: Optional[Schema]) -> List:
+        model_cls = self._get_model()
+        entries = [split_prefetch_entry(entry) for entry in self.prefetch]
+        if self.prefetch_from_schema and schema is not None:
+            paths = schema_prefetch_paths(model_cls, schema)
+            entries.extend((list(path), None) for path in paths)
+
+        opts = []
+        for rels, strategy in entries:
+            strategy = strategy or self.prefetch_strategy
+            strategies = [self._prefetch_loader(rel, strategy) for rel in rels]
+            opts.append(loader_chain(rels, strategies))
+
+        if self.column_projection_enabled and schema is not None:
+            plan = schema_column_plan(model_cls, schema)
+            # prefetched relationships need their join columns loaded too
+            for rels, _ in entries:
+                path = ()
+                for rel in rels:
+                    parent_columns, child_columns = relationship_columns(rel.property)
+                    if plan.get(path) is not None:
+                        plan[path].update(parent_columns)
+                    path += (rel.key,)
+                    if plan.get(path) is not None:
+                        plan[path].update(child_columns)
+            opts.extend(projection_options(model_cls, plan))
+        return opts
+
+    def _prefetch_loader(self, rel, strategy: str) -> str:
+        """Pick the loader strategy for one relationship in a prefetch chain."""
+        return resolve_strategy(strategy, rel)
+
+    def _coerce_key(self, value, column=None, message: Optional[str] = None):
+        """Convert a key from the URL or a cursor to the type of the key column.
+
+        Aborts with 400 and `message` if it doesn't fit."""
+        if column is None:
+            column = self._get_key_column()
+        if message is None:
+            message = f"Invalid key: {value}"
+        if value is None or isinstance(value, (dict, list)):
+            abort(400, message=message)
+        try:
+            python_type = column.type.python_type
+        except NotImplementedError:
+            return value
+        if isinstance(value, python_type):
+            return value
+        try:
+            return python_type(value)
+        except (TypeError, ValueError):
+            abort(400, message=message)
+
+    def _record_tombstones(self, keys: List, scopes: Optional[List] = None):
+        """Record `keys` as deleted in `tombstone_model`, if set, in the current transaction.
+
+        `scopes` are the items' `tombstone_scope_column` values, queried if not given.
+        """
+        if self.tombstone_model is None or not keys:
+            return
+        if scopes is None and self.tombstone_scope_column is not None:
+            scopes = self._tombstone_scopes_of(keys)
+        table = inspect(self.tombstone_model).local_table
+        self._db.session.execute(
+            table.insert(), tombstone_values(self._get_model(), keys, scopes)
+        )
+
+    def _tombstone_scopes_of(self, keys: List) -> List:
+        """Query the `tombstone_scope_column` values of items `keys`, before deleting them."""
+        key = self._get_key_column()
+        scope = getattr(self._get_model(), self.tombstone_scope_column)
+        rows = self._db.session.query(key, scope).filter(key.in_(keys))
+        scopes = dict(rows.all())
+        return [scopes.get(k) for k in keys]
+
     @property
     def _db(self) -> SQLAlchemy:
         """For laziness."""
         return _crud.db
 
     def _get_current_user(self) -> Optional[AccessControlUser]:
-        get_user_func = _crud.app.config.get(config_keys["get_user"])
-        if not get_user_func:
-            return None
-        return get_user_func()
+        return _get_current_user()
 
     def _access_checks_enabled(self) -> bool:
-        return _crud.access_control_enabled and self.access_checks_enabled
+        return self._config.access_checks_enabled
 
     def _abort_access_check_failed(self, model: Model):
         """Abort with HTTP 403 if access control checks failed and log."""
@@ -88,9 +440,24 @@ class CRUDView(MethodView):
         )
         abort(403)
 
+    def _access_criterion(self, check: str):
+        """SQL criterion for the model's `user_can_{check}` :class:`access_rule`, if any."""
+        model_cls = self._get_model()
+        if check not in self._config.access_rules:
+            return None
+
+        user = self._get_current_user()
+        if not user:
+            if self._access_checks_enabled():
+                self._abort_access_check_failed(model_cls)
+            return None
+        return access_criterion(model_cls, check, user)
+
+    @timed("access")
     def _check_can(self, check: str, model: Model, *args, **kwargs):
         """Check if current user can do `check` on `model`."""
-        if not self._access_checks_enabled():
+        config = self._config
+        if not config.access_checks_enabled:
             return
 
         user = self._get_current_user()
@@ -98,16 +465,74 @@ class CRUDView(MethodView):
             self._abort_access_check_failed(model)
 
         # get check method
-        chkmeth = f"user_can_{check}"
-        if not hasattr(model, chkmeth):
+        chkmeth = self._check_method(check)
+        if chkmeth is None:
             raise NotImplementedError(
-                f"{chkmeth}() is not implemented on {model} but CRUD access checks are enabled"
+                f"user_can_{check}() is not implemented on {model} but CRUD access checks are enabled"
             )
         chkmeth_callable = getattr(model, chkmeth)
-        # call check method
-        if not chkmeth_callable(user, *args, **kwargs):
+        # call check method, reusing earlier decisions in this request
+        allowed = _cached_check(
+            user, check, model, lambda: chkmeth_callable(user, *args, **kwargs)
+        )
+        if not allowed:
             self._abort_access_check_failed(model)
 
+    def _check_can_many(self, check: str, items: List[Model], *args):
+        """Check if current user can do `check` on all of `items` at once.
+
+        Extra `args` are lists with one value per item.
+        """
+        if not self._access_checks_enabled() or not items:
+            return
+
+        if not all(self._check_results(check, items, *args)):
+            self._abort_access_check_failed(self._get_model())
+
+    def _filter_can_read(self, items: List[Model]) -> List[Model]:
+        """Return the `items` the current user can read."""
+        if not self._access_checks_enabled() or not items:
+            return items
+
+        allowed = self._check_results("read", items)
+        return [item for item, ok in zip(items, allowed) if ok]
+
+    @timed("access")
+    def _check_results(self, check: str, items: List[Model], *args) -> List[bool]:
+        """Call `user_can_{check}_many`, or `user_can_{check}` on each item."""
+        model_cls = self._get_model()
+        user = self._get_current_user()
+        if not user:
+            self._abort_access_check_failed(model_cls)
+
+        batch_meth = self._check_method(check, batch=True)
+        if batch_meth is not None:
+            return getattr(model_cls, batch_meth)(user, items, *args)
+
+        chkmeth = self._check_method(check)
+        if chkmeth is None:
+            raise NotImplementedError(
+                f"user_can_{check}() is not implemented on {model_cls} but CRUD access checks are enabled"
+            )
+        item_args = zip(*args) if args else [()] * len(items)
+        return [getattr(item, chkmeth)(user, *a) for item, a in zip(items, item_args)]
+
+    def _check_method(self, check: str, batch: bool = False) -> Optional[str]:
+        """Name of the model method implementing `check`, None if there is none.
+
+        With `batch`, the `user_can_{check}_many` method checking a list of items.
+        Checks other than read, write and create, like ``"adopt"``, are looked up
+        on the model on every call."""
+        config = self._config
+        if check in CHECK_METHODS:
+            implemented = config.batch_checks if batch else config.checks
+            if check not in implemented:
+                return None
+            chkmeth = CHECK_METHODS[check]
+            return f"{chkmeth}_many" if batch else chkmeth
+        chkmeth = f"user_can_{check}_many" if batch else f"user_can_{check}"
+        return chkmeth if hasattr(self._get_model(), chkmeth) else None
+
     def _check_can_read(self, model: Model):
         return self._check_can("read", model)
 
@@ -137,15 +562,38 @@ class CollectionView(CRUDView):
             create_enabled = True
             list_enabled = True
 
+            def query_for_user(self):
+                return super().query_for_user().filter_by(name='mischa')
+
             @pet_blp.response(PetSchema(many=True))
             def get(self):
-                query = super().get()
-                return query.filter_by(name='mischa')
+                return super().get()
 
             @pet_blp.arguments(PetSchema)
             @pet_blp.response(PetSchema(many=True))
             def post(self, args):
                 return super().post(args)
+
+    With `keyset_pagination_enabled` set, :meth:`get` returns one page of items and
+    puts the cursor for the next page in the ``X-Pagination`` header.
+    Pass it back as ``?cursor=`` (and optionally ``?page_size=``) to fetch the next page.
+
+    Filter listings by overriding :meth:`query_for_user` as above. :meth:`get`
+    only returns a query when no option below serializes the response itself.
+
+    With `streaming_enabled` set, :meth:`get` returns a streaming response that is
+    serialized in batches of `stream_batch_size` with the view's response schema.
+
+    With `sparse_fields_enabled` set and ``?fields=`` passed, :meth:`get` returns
+    a response already serialized with just those fields.
+
+    With `export_enabled` set, ``?export=csv`` (or ``arrow``, ``parquet``) on
+    :meth:`get` streams the collection as a file, see :meth:`export`.
+
+    With `change_feed_enabled` set, ``?since=`` on :meth:`get` returns only what
+    changed since a cursor, see :mod:`smorest_crud.changes`.
+
+    For bulk PATCH and DELETE add :class:`BulkCollectionMixin`.
     """
 
     list_enabled: bool = False
@@ -154,22 +602,444 @@ class CollectionView(CRUDView):
     create_enabled: bool = False
     """Enable POST."""
 
-    prefetch: Iterable[RelationshipProperty] = []
-    """List of relationships to `prefetch <https://docs.sqlalchemy.org/en/13/orm/loading_relationships.html#relationship-loading-with-loader-options>`_ when listing."""
+    keyset_pagination_enabled: bool = False
+    """Paginate GET by key (``WHERE key > :cursor``) instead of returning the whole collection.
+
+    Pages are ordered by `CRUD_DEFAULT_KEY_COLUMN` or the primary key."""
+
+    page_size: int = 50
+    """Default number of items per page when paginating."""
+
+    max_page_size: int = 1000
+    """Largest ``?page_size=`` a client may request."""
+
+    streaming_enabled: bool = False
+    """Stream GET responses batch by batch instead of serializing the whole list at once."""
+
+    stream_format: str = "ndjson"
+    """Streamed body format: ``ndjson`` (one object per line) or ``json`` (a JSON array)."""
+
+    stream_batch_size: int = 1000
+    """Number of rows fetched and serialized at a time when streaming."""
+
+    export_enabled: bool = False
+    """Accept ``?export=`` on GET to download the collection in one of `export_formats`."""
+
+    export_formats: Iterable[str] = ("csv", "arrow", "parquet")
+    """Formats offered for export. Arrow IPC and Parquet need pyarrow installed."""
+
+    export_batch_size: int = 5000
+    """Number of rows fetched and written at a time when exporting."""
+
+    change_feed_enabled: bool = False
+    """Accept ``?since=`` on GET to return items changed after a cursor and deleted keys.
+
+    Requires `change_column`. Pages hold up to ``?page_size=`` items."""
 
+    change_column: Optional[str] = None
+    """Attribute of `model` increasing with every insert and update, e.g. ``updated_at``.
+
+    Unlike `version_column` it has to increase across the whole table."""
+
+    bulk_create_enabled: bool = False
+    """Accept a list of items in POST, inserted in bulk in one transaction.
+
+    Decorate :meth:`post` with a ``many=True`` arguments schema to use it."""
+
+    bulk_create_chunk_size: int = 1000
+    """Number of rows inserted per executemany when bulk creating."""
+
+    bulk_create_return_keys: bool = False
+    """Return the keys of bulk created items.
+
+    Generated keys have to be fetched, which inserts row by row on some databases.
+    Otherwise only the number of created items is returned, as ``{"created": n}``."""
+
+    multi_get_enabled: bool = False
+    """Accept ``?ids=1,2,3`` on GET to fetch just those items in one query.
+
+    Items are returned in the requested order; keys that weren't found are
+    listed in the ``X-Missing-Keys`` header."""
+
+    list_read_checks_enabled: bool = False
+    """Also run `user_can_read` on listed items, leaving out those that fail.
+
+    Checks a page or stream batch at once with `user_can_read_many`.
+    Without pagination or streaming this loads the whole list."""
+
+    @timed_view
     def get(self) -> BaseQuery:
         """List collection.
 
-        :returns: query or iterable of `Model`s."""
+        :returns: query of `Model`s; a list of them when paginated, fetched by
+            ``?ids=`` or read checked; or a :class:`flask.Response` already
+            serialized when streaming, exporting, answering ``?since=`` or
+            ``?fields=``, with `fast_serialization_enabled` or body ETags."""
         if not self.list_enabled:
             abort(405)
 
+        if self.multi_get_enabled and "ids" in request.args:
+            return self._dump_response(self.get_many(self._get_requested_ids()))
+
         query = self.query_for_user()
 
+        export_format = self._get_export_format()
+        if export_format is not None:
+            return self.export(query, export_format)
+
+        if self.change_feed_enabled and "since" in request.args:
+            return self.changes_since(query, request.args["since"])
+
+        if self.etag_enabled and self.version_column is not None:
+            # checked before loading anything
+            etag = self._collection_etag(query)
+            if request.if_none_match.contains_weak(etag):
+                return self._not_modified(etag)
+            self._set_etag_header(etag)
+
         query = self._add_prefetch(query)
 
-        return query
+        if self.streaming_enabled:
+            return self.stream(query)
+
+        if self.keyset_pagination_enabled:
+            query = self.paginate_keyset(query)
+
+        if self.list_read_checks_enabled:
+            query = self._filter_can_read(list(query))
+
+        return self._dump_response(query)
+
+    def _collection_etag(self, query: BaseQuery) -> str:
+        """ETag from the number of items, their greatest key and their `version_column` values.
+
+        Integer versions are counted per row and summed, so an update to any item
+        changes the tag; other columns like ``updated_at`` use their latest value.
+        Query arguments such as cursors and page sizes are part of the tag."""
+        version = self._get_version_column()
+        aggregate = func.sum if _python_type(version) is int else func.max
+        count, last_key, versions = (
+            query.order_by(None)
+            .with_entities(
+                func.count(), func.max(self._get_key_column()), aggregate(version)
+            )
+            .one()
+        )
+        args = sorted(request.args.items(multi=True))
+        return self._version_etag(count, last_key, versions, args)
+
+    def stream(self, query: BaseQuery) -> Response:
+        """Build a streaming response serializing `query` in batches.
+
+        Serialized items are expunged from the session so memory use stays flat.
+        """
+        schema = self._get_dump_schema("get")
+        if schema is None:
+            raise Exception(f"no response schema found to stream {self}")
+        if self.stream_format not in ("ndjson", "json"):
+            raise ValueError(f"unknown stream_format {self.stream_format!r}")
+
+        session = query.session
+        batch_size = self.stream_batch_size
+        ndjson = self.stream_format == "ndjson"
+        dumper = self._get_dumper("get")
+        encode = json.dumps if dumper is None else _encode_fast
+
+        def dump(batch):
+            readable = batch
+            if self.list_read_checks_enabled:
+                readable = self._filter_can_read(batch)
+            if dumper is None:
+                rows = schema.dump(readable, many=True)
+            elif schema.many:
+                rows = dumper(readable)
+            else:
+                rows = [dumper(item) for item in readable]
+            for item in batch:
+                session.expunge(item)
+            return rows
+
+        def generate():
+            first = True
+            batch = []
+            if not ndjson:
+                yield "["
+            for item in query.yield_per(batch_size):
+                batch.append(item)
+                if len(batch) < batch_size:
+                    continue
+                rows = dump(batch)
+                if rows:
+                    yield _encode_rows(rows, ndjson, first, encode)
+                    first = False
+                batch = []
+            if batch:
+                rows = dump(batch)
+                if rows:
+                    yield _encode_rows(rows, ndjson, first, encode)
+            if not ndjson:
+                yield "]"
+
+        mimetype = "application/x-ndjson" if ndjson else "application/json"
+        return Response(stream_with_context(generate()), mimetype=mimetype)
+
+    def export(self, query: BaseQuery, export_format: str) -> Response:
+        """Build a streaming response writing `query` as CSV, Arrow IPC or Parquet.
+
+        Exports the columns the response schema (narrowed by ``?fields=``) dumps
+        as plain fields, converted like the JSON response. Rows are read
+        `export_batch_size` at a time as tuples through a server-side cursor;
+        with `list_read_checks_enabled` items are loaded and checked per batch.
+        """
+        schema = self._get_dump_schema("get")
+        if schema is None:
+            raise Exception(f"no response schema found to export {self}")
+        model_cls = self._get_model()
+        columns = export_columns(model_cls, schema)
+        batch_size = self.export_batch_size
+
+        def checked_batches():
+            session = query.session
+            for batch in batched(query.yield_per(batch_size), batch_size):
+                rows = [
+                    [getattr(item, column.attr) for column in columns]
+                    for item in self._filter_can_read(batch)
+                ]
+                for item in batch:
+                    session.expunge(item)
+                if rows:
+                    yield convert_rows(columns, rows)
+
+        def batches():
+            rows = (
+                query.with_entities(*(getattr(model_cls, c.attr) for c in columns))
+                .execution_options(stream_results=True)
+                .yield_per(batch_size)
+            )
+            for batch in batched(rows, batch_size):
+                yield convert_rows(columns, batch)
+
+        if self.list_read_checks_enabled:
+            body = WRITERS[export_format](columns, checked_batches())
+        else:
+            body = WRITERS[export_format](columns, batches())
+        response = Response(
+            stream_with_context(body), mimetype=MIMETYPES[export_format]
+        )
+        filename = f"{model_cls.__tablename__}.{export_format}"
+        response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    def changes_since(self, query: BaseQuery, cursor: str) -> Response:
+        """Return a page of items of `query` changed after `cursor` and keys deleted since.
+
+        Items are ordered by `change_column` and key, continuing after the
+        position in `cursor` (all items if empty). Deleted keys come from
+        `tombstone_model`, limited to the current user's :meth:`tombstone_scopes`.
+        """
+        change = getattr(self._get_model(), self.change_column)
+        key = self._get_key_column()
+        page_size = self._get_page_size()
+
+        last_change = last_key = last_tombstone = None
+        if cursor:
+            try:
+                last_change, last_key, last_tombstone = decode_cursor(cursor)
+                last_change = coerce_change_value(change, last_change)
+            except ValueError:
+                abort(400, message="Invalid cursor.")
+            if last_change is not None:
+                last_key = self._coerce_key(last_key, message="Invalid cursor.")
+            if last_tombstone is not None and (
+                not isinstance(last_tombstone, int) or isinstance(last_tombstone, bool)
+            ):
+                # tombstones are paged by their integer id
+                abort(400, message="Invalid cursor.")
+        if last_change is not None:
+            query = query.filter(
+                or_(change > last_change, and_(change == last_change, key > last_key))
+            )
+
+        items = (
+            self._add_prefetch(query)
+            .order_by(None)
+            .order_by(change, key)
+            .limit(page_size + 1)
+            .all()
+        )
+        has_more = len(items) > page_size
+        items = items[:page_size]
+        if items:
+            last_change = getattr(items[-1], change.key)
+            last_key = getattr(items[-1], key.key)
+        if self.list_read_checks_enabled:
+            items = self._filter_can_read(items)
+
+        deleted = []
+        if self.tombstone_model is not None:
+            deleted, last_tombstone, more_deleted = tombstones_since(
+                self._read_session()(),
+                self.tombstone_model,
+                self._get_model(),
+                last_tombstone,
+                page_size,
+                scopes=self.tombstone_scopes(),
+            )
+            has_more = has_more or more_deleted
+
+        body = dict(
+            items=self._dump_list(items),
+            deleted=deleted,
+            next_cursor=encode_cursor([last_change, last_key, last_tombstone]),
+            has_more=has_more,
+        )
+        if self.fast_serialization_enabled:
+            return json_response(body)
+        return jsonify(body)
+
+    def tombstone_scopes(self) -> Optional[List]:
+        """`tombstone_scope_column` values whose deletes the current user is told about.
 
+        None reports all deletes. Views with access checks have to override it,
+        e.g. returning the current user's id for tombstones scoped by ``owner_id``.
+        """
+        return None
+
+    def _dump_list(self, items: List[Model]) -> List[dict]:
+        """Serialize `items` with the response schema of GET."""
+        schema = self._get_dump_schema("get")
+        if schema is None:
+            raise Exception(f"no response schema found to serialize {self}")
+        dumper = self._get_dumper("get")
+        if dumper is None:
+            return schema.dump(items, many=True)
+        if schema.many:
+            return dumper(items)
+        return [dumper(item) for item in items]
+
+    def _get_export_format(self) -> Optional[str]:
+        """Return ``?export=`` format requested for GET, if enabled."""
+        if not self.export_enabled:
+            return None
+        export_format = request.args.get("export")
+        if export_format is None:
+            return None
+        if export_format not in available_formats(self.export_formats):
+            abort(400, message=f"Unsupported export format: {export_format}")
+        return export_format
+
+    def paginate_keyset(self, query: BaseQuery) -> List[Model]:
+        """Return the page of `query` following ``?cursor=``.
+
+        Sets the ``X-Pagination`` response header with ``next_cursor`` (null on the last page).
+        """
+        key = self._get_key_column()
+        page_size = self._get_page_size()
+
+        cursor = request.args.get("cursor")
+        if cursor:
+            try:
+                (last_key,) = decode_cursor(cursor)
+            except ValueError:
+                abort(400, message="Invalid cursor.")
+            last_key = self._coerce_key(last_key, message="Invalid cursor.")
+            query = query.filter(key > last_key)
+
+        # fetch one extra row to find out if there is a next page
+        items = query.order_by(None).order_by(key).limit(page_size + 1).all()
+        next_cursor = None
+        if len(items) > page_size:
+            items = items[:page_size]
+            next_cursor = encode_cursor([getattr(items[-1], key.key)])
+
+        pagination = json.dumps(dict(page_size=page_size, next_cursor=next_cursor))
+
+        @after_this_request
+        def add_pagination_header(response):
+            response.headers["X-Pagination"] = pagination
+            return response
+
+        return items
+
+    def get_many(self, keys: List) -> List[Model]:
+        """Fetch the items identified by `keys` with a single ``IN`` query.
+
+        :param keys: `CRUD_DEFAULT_KEY_COLUMN` or primary key values.
+        :returns: Items in the order of `keys`, leaving out missing ones.
+        """
+        key = self._get_key_column()
+        keys = [self._coerce_key(value) for value in keys]
+
+        query = self._add_prefetch(self.query_for_user())
+        found = {
+            getattr(item, key.key): item for item in query.filter(key.in_(set(keys)))
+        }
+        items = [found[value] for value in keys if value in found]
+        if self.list_read_checks_enabled:
+            items = self._filter_can_read(items)
+            readable = {id(item) for item in items}
+            found = {k: item for k, item in found.items() if id(item) in readable}
+
+        missing = json.dumps([value for value in keys if value not in found])
+
+        @after_this_request
+        def add_missing_header(response):
+            response.headers["X-Missing-Keys"] = missing
+            return response
+
+        return items
+
+    def _get_requested_ids(self) -> List[str]:
+        ids = [
+            value.strip()
+            for arg in request.args.getlist("ids")
+            for value in arg.split(",")
+            if value.strip()
+        ]
+        if len(ids) > self.max_page_size:
+            abort(400, message=f"Can't fetch more than {self.max_page_size} items.")
+        return ids
+
+    def bulk_create(self, args_list: List[dict]) -> List:
+        """Create many models at once.
+
+        Access is checked for the whole batch with `user_can_create_many`, then
+        rows are inserted in chunks of `bulk_create_chunk_size` and committed once.
+
+        :param args_list: Deserialized schema args, one per item.
+        :returns: Keys of the created models if `bulk_create_return_keys` is set,
+            otherwise a response with the number created.
+        """
+        items = [self.model(**args) for args in args_list]
+
+        self._check_can_many("create", items, args_list)
+
+        session = self._db.session
+        chunk_size = self.bulk_create_chunk_size
+        for start in range(0, len(items), chunk_size):
+            session.bulk_save_objects(
+                items[start : start + chunk_size],
+                return_defaults=self.bulk_create_return_keys,
+            )
+        session.commit()
+
+        if self.bulk_create_return_keys:
+            key = self._get_key_column().key
+            return [{key: getattr(item, key)} for item in items]
+        # without fetched keys the items are incomplete, don't return them
+        return jsonify(created=len(items))
+
+    def _get_page_size(self) -> int:
+        page_size = request.args.get("page_size", self.page_size)
+        try:
+            page_size = int(page_size)
+        except ValueError:
+            abort(400, message="Invalid page_size.")
+        if page_size < 1:
+            abort(400, message="Invalid page_size.")
+        return min(page_size, self.max_page_size)
+
+    @timed_view
     def post(self, args=None):
         """Create new model.
 
@@ -179,6 +1049,11 @@ class CollectionView(CRUDView):
         if not self.create_enabled:
             abort(405)
 
+        if isinstance(args, list):
+            if not self.bulk_create_enabled:
+                abort(405)
+            return self.bulk_create(args)
+
         # create
         item = self.model(**args)
 
@@ -189,24 +1064,178 @@ class CollectionView(CRUDView):
         self._db.session.commit()
         return item
 
-    def _add_prefetch(self, query: BaseQuery) -> BaseQuery:
-        if self.prefetch:
-            # apply joinedloaded rels
-            for rels in self.prefetch:
-                if _is_listy(rels):
-                    # list/tuple, construct chain of joinedloads
-                    if len(rels) > 1:
-                        opts = reduce(
-                            lambda o, r: o.joinedload(r), rels[1:], joinedload(rels[0])
-                        )
-                    else:
-                        opts = joinedload(rels[0])
-                else:
-                    # just a single relationship (not chained)
-                    opts = joinedload(rels)
-
-                query = query.options(opts)
-        return query
+    def _prefetch_loader(self, rel, strategy: str) -> str:
+        strategy = super()._prefetch_loader(rel, strategy)
+        if strategy == "joined" and is_collection(rel):
+            if self.keyset_pagination_enabled:
+                # joinedloading a collection forces the LIMITed query into a
+                # subquery, load it in a second query keyed on the page instead
+                return "selectin"
+            if self.streaming_enabled:
+                # yield_per can't joinedload collections
+                return "selectin"
+        return strategy
+
+
+class BulkCollectionMixin(object):
+    """Bulk PATCH and DELETE for a :class:`CollectionView`.
+
+    Kept out of :class:`CollectionView` so collections don't route or document
+    these methods unless they opt in::
+
+        @toy_blp.route("")
+        class ToyCollection(BulkCollectionMixin, CollectionView):
+            model = Toy
+            bulk_update_enabled = True
+
+            @toy_blp.arguments(ToyBulkSchema)
+            @toy_blp.response()
+            def patch(self, args):
+                return super().patch(args)
+
+    :meth:`patch` and :meth:`delete` take args selecting items either by
+    ``keys`` (a list of `CRUD_DEFAULT_KEY_COLUMN` or primary key values) or by
+    ``filter`` (a dict of column equality filters), and for PATCH the column
+    ``values`` to set::
+
+        {"keys": [1, 2, 3], "values": {"species": "Canis"}}
+        {"filter": {"genus": "Felis"}}
+
+    Only items in :meth:`query_for_user` that pass the write check are affected.
+    ORM events and cascades are not run.
+    """
+
+    bulk_update_enabled: bool = False
+    """Enable PATCH, updating many items with set-based UPDATE statements."""
+
+    bulk_delete_enabled: bool = False
+    """Enable DELETE, deleting many items with set-based DELETE statements."""
+
+    bulk_chunk_size: int = 500
+    """Number of keys per UPDATE/DELETE statement in bulk PATCH and DELETE."""
+
+    bulk_commit_per_chunk: bool = False
+    """Commit after every chunk of a bulk PATCH or DELETE to hold locks for less time.
+
+    If a chunk fails, earlier chunks stay applied."""
+
+    @timed_view
+    def patch(self, args=None) -> dict:
+        """Update many models.
+
+        :param args: Deserialized args with ``keys`` or ``filter``, and ``values``.
+        :returns: ``{"affected": [keys], "skipped": [keys]}``.
+        """
+        if not self.bulk_update_enabled:
+            abort(405)
+
+        values = args.get("values")
+        if not values:
+            abort(400, message="No values to update.")
+        mapper = inspect(self._get_model())
+        unknown = set(values) - set(mapper.column_attrs.keys())
+        if unknown:
+            abort(400, message=f"Can't bulk update {', '.join(sorted(unknown))}.")
+
+        values = {mapper.column_attrs[attr].columns[0]: v for attr, v in values.items()}
+        table = mapper.local_table
+        return self._bulk_execute(
+            args, lambda keys: table.update().where(self._key_in(keys)).values(values)
+        )
+
+    @timed_view
+    def delete(self, args=None) -> dict:
+        """Delete many models.
+
+        :param args: Deserialized args with ``keys`` or ``filter``.
+        :returns: ``{"affected": [keys], "skipped": [keys]}``.
+        """
+        if not self.bulk_delete_enabled:
+            abort(405)
+
+        table = inspect(self._get_model()).local_table
+
+        def make_statement(keys):
+            self._record_tombstones(keys)
+            return table.delete().where(self._key_in(keys))
+
+        return self._bulk_execute(args, make_statement)
+
+    def _key_in(self, keys: List):
+        return self._get_key_column().in_(keys)
+
+    def _bulk_execute(self, args: dict, make_statement) -> dict:
+        """Run `make_statement(keys)` for each chunk of writable keys selected by `args`."""
+        session = self._db.session
+        requested = args.get("keys")
+        affected = []
+        cache_keys = []
+        for keys in self._bulk_key_chunks(args):
+            if keys:
+                cache_keys.extend(self._cache_keys(keys))
+                session.execute(make_statement(keys))
+                affected.extend(keys)
+            if self.bulk_commit_per_chunk:
+                session.commit()
+                self._uncache(cache_keys)
+                cache_keys = []
+        session.commit()
+        self._uncache(cache_keys)
+
+        result = dict(affected=affected)
+        if requested is not None:
+            done = set(affected)
+            result["skipped"] = [key for key in requested if key not in done]
+        return result
+
+    def _uncache(self, cache_keys: List[str]):
+        """Invalidate committed items, set-based statements don't go through the session's flush."""
+        for key in cache_keys:
+            _crud.cache.delete(key)
+
+    def _cache_keys(self, keys: List) -> List[str]:
+        """Cache keys of the items with `keys`, which are cached by primary key."""
+        model_cls = self._get_model()
+        mapper = inspect(model_cls)
+        if mapper.primary_key == (self._get_key_column().property.columns[0],):
+            return [cache_key(model_cls, key) for key in keys]
+        rows = self._db.session.query(*mapper.primary_key).filter(self._key_in(keys))
+        return [cache_key(model_cls, tuple(row)) for row in rows]
+
+    def _bulk_key_chunks(self, args: dict) -> Iterator[List]:
+        """Yield chunks of keys selected by `args` that the current user may write."""
+        keys, filters = args.get("keys"), args.get("filter")
+        if (keys is None) == (filters is None):
+            abort(400, message="Pass either keys or filter.")
+
+        key = self._get_key_column()
+        query = self.query_for_user()
+        if filters is not None:
+            unknown = set(filters) - set(inspect(self._get_model()).column_attrs.keys())
+            if unknown:
+                abort(400, message=f"Can't filter by {', '.join(sorted(unknown))}.")
+            query = query.filter_by(**filters)
+            keys = [k for (k,) in query.with_entities(key)]
+        else:
+            keys = list(dict.fromkeys(keys))
+
+        chunk_size = self.bulk_chunk_size
+        for start in range(0, len(keys), chunk_size):
+            chunk = query.filter(key.in_(keys[start : start + chunk_size]))
+            yield self._writable_keys(chunk)
+
+    def _writable_keys(self, query: BaseQuery) -> List:
+        """Return keys of items in `query` the current user may write."""
+        key = self._get_key_column()
+        if self._access_checks_enabled():
+            criterion = self._access_criterion("write")
+            if criterion is None:
+                # no SQL rule, check loaded items in one batch
+                items = query.all()
+                allowed = self._check_results("write", items)
+                return [getattr(i, key.key) for i, ok in zip(items, allowed) if ok]
+            query = query.filter(criterion)
+        return [k for (k,) in query.with_entities(key)]
 
 
 class ResourceView(CRUDView):
@@ -258,11 +1287,100 @@ class ResourceView(CRUDView):
     delete_enabled: bool = False
     """Enable DELETE."""
 
+    filtered_lookup_enabled: bool = False
+    """Look items up through :meth:`query_for_user` instead of by primary key alone.
+
+    Items the user can't see are rejected with a 404 by the same SELECT, and the
+    Python `user_can_read` check is skipped. Items are matched on
+    `CRUD_DEFAULT_KEY_COLUMN` or the primary key."""
+
+    fast_update_enabled: bool = False
+    """Run PATCH as a single ``UPDATE ... WHERE key = :pk AND <access rule>``.
+
+    Used when all args are plain columns and access checks are disabled or
+    `user_can_write` is an :class:`access_rule`; otherwise the item is loaded
+    and updated as usual. ORM events and :meth:`_check_can_write` are skipped.
+    The updated row is returned with ``RETURNING`` where the database supports it."""
+
+    cache_enabled: bool = False
+    """Serve GET from `CRUD.cache`, keyed by model and key.
+
+    Cached items are merged into the session without querying and checked with
+    `user_can_read`. Entries are invalidated by PATCH, DELETE and by commits
+    changing the item."""
+
     def _lookup(self, pk):
         """Get model by primary key."""
-        item = self.model.query.get_or_404(pk)
+        if self.filtered_lookup_enabled:
+            return self._lookup_for_user(pk)
+
+        method = request.method.lower()
+        locking = self._locks_lookup()
+        if self._get_sparse_fields() is None and not locking:
+            lookup = plan_cache.get(
+                ("lookup", type(self), method), lambda: self._bake_lookup(method)
+            )
+            if lookup is not None:
+                session = self._read_session()()
+                item = lookup(session).params(crud_pk=pk).one_or_none()
+                if item is None:
+                    abort(404)
+                return item
+
+        query = self._add_prefetch(self.query(), method)
+        if locking:
+            query = self._for_update(query)
+        item = query.get_or_404(pk)
         return item
 
+    def _locks_lookup(self) -> bool:
+        """Whether to lock the looked up row, for a write conditional on ``If-Match``.
+
+        Keeps its version from changing between the check and the commit."""
+        return (
+            self.etag_enabled
+            and request.method in ("PATCH", "DELETE")
+            and "If-Match" in request.headers
+        )
+
+    def _for_update(self, query: BaseQuery) -> BaseQuery:
+        return query.with_for_update(of=inspect(self._get_model()).local_table)
+
+    def _bake_lookup(self, method: str):
+        """Bake the primary key lookup of `method`, so its SQL is compiled once.
+
+        Returns None if the view overrides :meth:`query`, the model has its own
+        `query_class` (baked queries are plain SQLAlchemy queries) or the primary
+        key is composite.
+        """
+        if type(self).query is not CRUDView.query:
+            return None
+        model_cls = self._get_model()
+        if model_cls.query_class is not self._db.Query:
+            return None
+        mapper = inspect(model_cls)
+        if len(mapper.primary_key) != 1:
+            return None
+
+        pk_column = mapper.primary_key[0]
+        opts = self._get_prefetch_options(method)
+        lookup = bakery(lambda session: session.query(model_cls), type(self), method)
+        if opts:
+            lookup += lambda q: q.options(*opts)
+        lookup += lambda q: q.filter(pk_column == bindparam("crud_pk"))
+        return lookup
+
+    def _lookup_for_user(self, pk):
+        """Get model by key if it is in :meth:`query_for_user`."""
+        query = self._add_prefetch(self.query_for_user(), request.method.lower())
+        if self._locks_lookup():
+            query = self._for_update(query)
+        item = query.filter(self._get_key_column() == pk).one_or_none()
+        if item is None:
+            abort(404)
+        return item
+
+    @timed_view
     def get(self, pk) -> BaseQuery:
         """Retreieve model by primary key.
 
@@ -270,11 +1388,133 @@ class ResourceView(CRUDView):
         if not self.get_enabled:
             abort(405)
 
+        versioned = self.etag_enabled and self.version_column is not None
+        if versioned and (
+            self.filtered_lookup_enabled or not self._access_checks_enabled()
+        ):
+            # nothing to check on the item, compare versions before loading it
+            etag = self._lookup_etag(pk)
+            if etag is not None and request.if_none_match.contains_weak(etag):
+                return self._not_modified(etag)
+
+        if self._cache_usable():
+            item, cached = self._cached_lookup(pk)
+        else:
+            item, cached = self._lookup(pk), False
+
+        if cached or not self.filtered_lookup_enabled:
+            # otherwise query_for_user() already filtered out unreadable items
+            self._check_can_read(item)
+
+        if versioned:
+            etag = self._item_etag(pk, item)
+            if request.if_none_match.contains_weak(etag):
+                return self._not_modified(etag)
+            self._set_etag_header(etag)
+
+        return self._dump_response(item)
+
+    def _lookup_etag(self, pk) -> Optional[str]:
+        """Query the `version_column` of item `pk` and return its ETag, or None if not found."""
+        row = self._lookup_version(pk)
+        if row is None:
+            return None
+        return self._version_etag(self._coerce_key(pk), row[0])
+
+    def _lookup_version(self, pk):
+        """Query the `version_column` of item `pk`, as a row or None if not found."""
+        query = self.query_for_user() if self.filtered_lookup_enabled else self.query()
+        return (
+            query.filter(self._get_key_column() == pk)
+            .with_entities(self._get_version_column())
+            .first()
+        )
+
+    def _item_etag(self, pk, item) -> str:
+        """ETag of a loaded item."""
+        if self.version_column is None:
+            return make_etag(self._get_dump_schema("get").dump(item))
+        version = getattr(item, self.version_column)
+        return self._version_etag(self._coerce_key(pk), version)
+
+    def _check_if_match(self, pk, item=None):
+        """Abort with 412 if ``If-Match`` doesn't match the current ETag of item `pk`.
+
+        :returns: The matched `version_column` value when checked without `item`,
+            for the write to require it.
+        """
+        if not self.etag_enabled or "If-Match" not in request.headers:
+            return None
+        version = None
+        if item is not None:
+            etag = self._item_etag(pk, item)
+        elif self.version_column is not None:
+            row = self._lookup_version(pk)
+            if row is None:
+                # not found, let the write 404
+                return None
+            version = row[0]
+            etag = self._version_etag(self._coerce_key(pk), version)
+        else:
+            etag = self._item_etag(pk, self._lookup(pk))
+        if not request.if_match.contains(etag):
+            self._abort_modified()
+        return version
+
+    def _abort_modified(self):
+        abort(412, message="Resource was modified")
+
+    def _cache_usable(self) -> bool:
+        # sparse fieldsets load partial items, keep them out of the cache
+        return self.cache_enabled and self._get_sparse_fields() is None
+
+    def _cached_lookup(self, pk):
+        """Get model from `CRUD.cache`, or look it up and cache it.
+
+        :returns: item and whether it came from the cache.
+        """
+        key = self._lookup_cache_key(pk)
+        if key is None:
+            return self._lookup(pk), False
+
+        cache = _crud.cache
+        cached = cache.get(key)
+        if cached is not None:
+            try:
+                session = self._read_session()
+                return session.merge(cached, load=False), True
+            except InvalidRequestError:
+                # e.g. the cached instance has pending changes
+                cache.delete(key)
+
         item = self._lookup(pk)
-        self._check_can_read(item)
+        cache.set(key, detached_copy(item))
+        return item, False
 
-        return item
+    def _lookup_cache_key(self, pk) -> Optional[str]:
+        """Cache key of item `pk`, None if `pk` isn't its primary key.
+
+        Filtered lookups find items by `CRUD_DEFAULT_KEY_COLUMN`, their
+        primary key is only known once loaded.
+        """
+        mapper = inspect(self._get_model())
+        if len(mapper.primary_key) != 1:
+            return None
+        column = mapper.primary_key[0]
+        if (
+            self.filtered_lookup_enabled
+            and self._get_key_column().property.columns[0] is not column
+        ):
+            return None
+        return cache_key(mapper.class_, self._coerce_key(pk, column))
+
+    def _invalidate_cache(self, item):
+        if self.cache_enabled:
+            key = item_cache_key(item)
+            if key is not None:
+                _crud.cache.delete(key)
 
+    @timed_view
     def patch(self, args=None, pk=None) -> BaseQuery:
         """Update model.
 
@@ -288,13 +1528,93 @@ class ResourceView(CRUDView):
         if not pk:
             raise Exception("pk not passed to patch()")
 
+        if self.fast_update_enabled and self._can_update_directly(args):
+            version = self._check_if_match(pk)
+            return self._update_directly(args, pk, version)
+
         item = self._lookup(pk)
         self._check_can_write(item)
+        self._check_if_match(pk, item)
 
         _update_attrs(item, args)
         self._db.session.commit()
+        self._invalidate_cache(item)
         return item
 
+    def _can_update_directly(self, args: dict) -> bool:
+        """Whether `args` can be applied with an UPDATE statement without loading the item."""
+        model_cls = self._get_model()
+        columns = plan_cache.get(
+            ("columns", model_cls),
+            lambda: frozenset(inspect(model_cls).column_attrs.keys()),
+        )
+        if not args or not columns.issuperset(args):
+            return False
+        return not self._access_checks_enabled() or "write" in self._config.access_rules
+
+    def _update_directly(self, args: dict, pk, version=None):
+        """Update the item with a single UPDATE statement, filtered by the write rule.
+
+        With `version`, only updates the item if its `version_column` still has
+        that value and aborts with 412 otherwise.
+        """
+        model_cls = self._get_model()
+        mapper = inspect(model_cls)
+        key = self._get_key_column()
+
+        values = {mapper.column_attrs[attr].columns[0]: v for attr, v in args.items()}
+        stmt = mapper.local_table.update().where(key == pk).values(values)
+        if self._access_checks_enabled():
+            stmt = stmt.where(self._access_criterion("write"))
+        if version is not None:
+            stmt = stmt.where(self._get_version_column() == version)
+
+        session = self._db.session
+        dialect = session.get_bind(mapper).dialect
+        returning = getattr(dialect, "update_returning", dialect.implicit_returning)
+        if returning:
+            stmt = stmt.returning(*mapper.local_table.columns)
+
+        result = session.execute(stmt)
+        row = result.fetchone() if returning else None
+        if result.rowcount == 0 or (returning and row is None):
+            session.rollback()
+            # tell apart missing, modified since the If-Match check and forbidden
+            if not self._item_exists(pk):
+                abort(404)
+            if version is not None:
+                row = self._lookup_version(pk)
+                if row is not None and row[0] != version:
+                    self._abort_modified()
+            self._abort_access_check_failed(model_cls)
+        session.commit()
+
+        if row is None:
+            item = self._lookup(pk)
+        else:
+            item = self._instance_from_row(mapper, row)
+        self._invalidate_cache(item)
+        return item
+
+    def _instance_from_row(self, mapper, row) -> Model:
+        """Attach an instance holding the column values of an UPDATE's RETURNING row.
+
+        Relationships and computed attributes are available as on a loaded item."""
+        item = mapper.class_manager.new_instance()
+        for prop in mapper.column_attrs:
+            column = prop.columns[0]
+            if column.table is mapper.local_table:
+                set_committed_value(item, prop.key, row[column])
+        make_transient_to_detached(item)
+        return self._db.session.merge(item, load=False)
+
+    def _item_exists(self, pk) -> bool:
+        """Check if an item with key `pk` exists (and is visible, for filtered lookups)."""
+        query = self.query_for_user() if self.filtered_lookup_enabled else self.query()
+        criterion = query.filter(self._get_key_column() == pk).exists()
+        return self._db.session.query(criterion).scalar()
+
+    @timed_view
     def delete(self, pk) -> BaseQuery:
         """Delete model.
 
@@ -305,9 +1625,22 @@ class ResourceView(CRUDView):
 
         item = self._lookup(pk)
         self._check_can_write(item)
+        self._check_if_match(pk, item)
 
+        scopes = None
+        if self.tombstone_scope_column is not None:
+            scopes = [getattr(item, self.tombstone_scope_column)]
         self._db.session.delete(item)
+        self._record_tombstones([getattr(item, self._get_key_column().key)], scopes)
         self._db.session.commit()
+        self._invalidate_cache(item)
+
+
+def _python_type(column) -> Optional[type]:
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return None
 
 
 def _update_attrs(item, attrs):
@@ -317,6 +1650,13 @@ def _update_attrs(item, attrs):
             setattr(item, attr, value)
 
 
-def _is_listy(thing) -> bool:
-    t = type(thing)
-    return t is list or t is tuple or t is set
+def _encode_rows(rows: List[dict], ndjson: bool, first: bool, encode=json.dumps) -> str:
+    """Encode a batch of serialized rows as NDJSON lines or JSON array elements."""
+    if ndjson:
+        return "".join(encode(row) + "\n" for row in rows)
+    body = ",".join(encode(row) for row in rows)
+    return body if first else "," + body
+
+
+def _encode_fast(row: dict) -> str:
+    return encode_json(row).decode()